@@ -0,0 +1,64 @@
+import json
+from datetime import datetime
+
+import lxml.html
+from readability import Document
+
+# Article parsing for the news pipeline. It lives in its own importable module
+# so extraction can run in a process pool under any start method (spawn and
+# forkserver pickle the function by module name, which the extension-less
+# ``main`` script cannot provide).
+
+# Meta tags that carry the publication time, checked before walking the DOM
+PUBLISHED_META_KEYS = {
+    'article:published_time', 'og:published_time', 'datepublished', 'pubdate',
+    'publishdate', 'publish-date', 'dc.date', 'dc.date.issued', 'parsely-pub-date', 'sailthru.date',
+}
+
+
+# Parse the page once with lxml: metadata first, then readability on the same tree
+def extract_article(html):
+    tree = lxml.html.document_fromstring(html.encode('utf-8', 'replace'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+    pub_date = find_publication_date(tree)
+    doc = Document(tree)
+    title = doc.title()
+    content = lxml.html.fragment_fromstring(doc.summary(html_partial=True), create_parent='div').text_content()
+    return title, content, pub_date
+
+
+def _json_ld_date(data):
+    if isinstance(data, list):
+        for item in data:
+            date = _json_ld_date(item)
+            if date:
+                return date
+    elif isinstance(data, dict):
+        if isinstance(data.get('datePublished'), str):
+            return data['datePublished']
+        return _json_ld_date(data.get('@graph'))
+    return None
+
+
+def find_publication_date(tree):
+    for meta in tree.iter('meta'):
+        key = (meta.get('property') or meta.get('name') or meta.get('itemprop') or '').lower()
+        if key in PUBLISHED_META_KEYS and meta.get('content'):
+            return meta.get('content')
+    for script in tree.xpath('//script[@type="application/ld+json"]'):
+        try:
+            date = _json_ld_date(json.loads(script.text or ''))
+        except ValueError:
+            continue
+        if date:
+            return date
+    # Search for common publication date tags
+    date_tags = ['time', 'span', 'p', 'div']
+    for tag in date_tags:
+        for element in tree.iter(tag):
+            if element.get('datetime'):
+                return element.get('datetime')
+            classes = (element.get('class') or '').split()
+            if 'date' in classes or 'time' in classes:
+                return element.text_content()
+    # If no date found, return current date for reference
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
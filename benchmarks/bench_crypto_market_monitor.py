@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture
+def crypto_market_monitor(stand_in, workdir, monkeypatch):
+    import crypto_market_monitor
+    monkeypatch.setattr(crypto_market_monitor, 'BLS_BASE_URL', f"{stand_in}/bls/publicAPI/v2/timeseries/data/")
+    monkeypatch.setattr(crypto_market_monitor, 'FRED_BASE_URL', f"{stand_in}/fred/series/observations")
+    monkeypatch.setattr(crypto_market_monitor, 'FEAR_GREED_INDEX_API', f"{stand_in}/fng/?limit=1")
+    return crypto_market_monitor
+
+
+# A cold run: every indicator is due, fetched, compared against an empty store and reported
+def bench_check_and_log_data(benchmark, crypto_market_monitor, workdir):
+    def setup():
+        workdir()
+        crypto_market_monitor.response_cache.entries = {}
+        crypto_market_monitor.initialize_data_file()
+
+    benchmark.pedantic(crypto_market_monitor.check_and_log_data, setup=setup, rounds=20, warmup_rounds=2)
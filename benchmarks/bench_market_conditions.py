@@ -0,0 +1,31 @@
+import random
+
+import pytest
+
+
+@pytest.fixture
+def market_conditions(stand_in, workdir):
+    import market_conditions
+    return market_conditions
+
+
+@pytest.fixture(scope='session')
+def news_content(kraken_recording):
+    # Roughly one day of scraped articles, with every base symbol mentioned a varying number of times
+    rng = random.Random(7)
+    words = [symbol.split('/')[0] for symbol in kraken_recording['markets']] + ['market', 'price', 'the', 'token'] * 200
+    return ' '.join(rng.choice(words) for _ in range(200000))
+
+
+# Candidate evaluation end to end: tickers and features for the whole USD universe, candles and rules
+def bench_candidate_evaluation(benchmark, market_conditions, kraken_recording, news_content):
+    from market_data import ReplayProvider
+
+    provider = ReplayProvider(data=kraken_recording)
+
+    def evaluate():
+        market_data = market_conditions.MarketData(provider)
+        symbols = market_conditions.get_usd_symbols(provider.markets())
+        return market_conditions.select_symbols(symbols, market_data, news_content, min_mentions=0)
+
+    benchmark.pedantic(evaluate, rounds=30, warmup_rounds=2)
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.fixture
+def monitor(stand_in, workdir):
+    import monitor
+    return monitor
+
+
+# One full CoinGecko sweep: 15k ids in 150 batched requests through the shared pool and limiter
+def bench_get_all_coin_prices(benchmark, monitor, recordings):
+    coin_ids = [coin['id'] for coin in recordings.coins]
+    prices = benchmark.pedantic(monitor.get_all_coin_prices, args=(coin_ids,), kwargs={'include_24hr_vol': True},
+                                rounds=5, warmup_rounds=1)
+    assert len(prices) == len(coin_ids)
+
+
+# A cold PriceMonitor tick over the whole universe: refresh, fetch, tiering, history update and alerts
+def bench_price_monitor_tick(benchmark, monitor, workdir, recordings):
+    def setup():
+        path = workdir()
+        return (monitor.PriceMonitor(interval=60, threshold=0.05, windows=(5,), universe_path=str(path / 'universe.json')),), {}
+
+    benchmark.pedantic(lambda price_monitor: price_monitor.tick(), setup=setup, rounds=5, warmup_rounds=1)
@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture
+def news(stand_in, workdir):
+    from script_loader import load_news_module
+    news = load_news_module()
+    try:
+        news.get_nlp()
+    except OSError:
+        # No downloaded model here: a blank pipeline keeps the NER stage in the measured path
+        import spacy
+        news._nlp = spacy.blank('en')
+    return news
+
+
+# The whole news run over a 500-article feed: feeds, link resolution, download, extraction, sentiment, NER
+def bench_news_main(benchmark, news, workdir):
+    def setup():
+        for store in news._link_stores.values():
+            store.close()
+        news._link_stores.clear()
+        news._nlp_cache = None
+        workdir()
+
+    benchmark.pedantic(news.main, setup=setup, rounds=3, warmup_rounds=1)
@@ -0,0 +1,209 @@
+import glob
+import json
+import os
+import random
+import sys
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.conftest import serving  # noqa: E402 (needs ROOT on sys.path)
+
+# Local stand-in for every upstream the monitors call. Responses are
+# synthetic recordings generated from a fixed seed, so runs are comparable.
+UNIVERSE_SIZE = 15000
+ARTICLE_COUNT = 500
+CRYPTOPANIC_COUNT = 50
+USD_PAIRS = 600
+SEED = 42
+
+WORDS = ("market price trading investors analysts network token exchange volume rally "
+         "support resistance liquidity growth adoption report quarter demand supply").split()
+POSITIVE = "great gains, strong growth, excellent rally, best week, investors love it"
+NEGATIVE = "terrible losses, awful crash, worst week, panic and fear everywhere"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # The first run has no saved baseline to compare against: record it instead of failing
+    storage = config.getoption('benchmark_storage', None)
+    if storage and storage.startswith('file://'):
+        pattern = os.path.join(os.path.expanduser(storage[len('file://'):]), '*', '*.json')
+        if not glob.glob(pattern):
+            config.option.benchmark_compare = False
+            config.option.benchmark_compare_fail = None
+
+
+class Recordings:
+    def __init__(self, seed=SEED):
+        rng = random.Random(seed)
+        self.coins = [{'id': f'coin-{i}', 'symbol': f'c{i}', 'name': f'Coin {i}'} for i in range(UNIVERSE_SIZE)]
+        self.prices = {coin['id']: {'usd': rng.uniform(0.001, 1000), 'usd_24h_vol': rng.choice([0, 10, 1e4, 1e7])}
+                       for coin in self.coins}
+        self.articles = [self._article(i, rng) for i in range(ARTICLE_COUNT)]
+
+    @staticmethod
+    def _article(i, rng):
+        tone = rng.choice([POSITIVE, NEGATIVE, ''])
+        topic = rng.choice(["Bitcoin", "Ethereum", "The Federal Reserve", "A local bakery"])
+        paragraphs = "".join(
+            f"<p>{topic} {' '.join(rng.choice(WORDS) for _ in range(60))}. {tone}</p>" for _ in range(8))
+        return (f"<html><head><title>Article {i}: {topic}</title>"
+                f"<meta property=\"article:published_time\" content=\"2024-01-01T00:{i % 60:02d}:00Z\"></head>"
+                f"<body><nav>menu</nav><article><h1>Article {i}</h1>{paragraphs}</article>"
+                f"<footer>footer</footer></body></html>")
+
+
+def rss(base, items):
+    entries = "".join(f"<item><title>{title}</title><link>{base}{path}</link><guid>{base}{path}</guid></item>"
+                      for title, path in items)
+    return f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>feed</title>{entries}</channel></rss>"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b'', content_type='application/json', headers=()):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        recordings = self.server.recordings
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        base = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+        path = url.path
+        if path == '/coingecko/coins/list':
+            return self._reply(200, recordings.coins)
+        if path == '/coingecko/simple/price':
+            ids = query['ids'][0].split(',')
+            volume = query.get('include_24hr_vol') == ['true']
+            return self._reply(200, {
+                coin_id: ({'usd': p['usd'], 'usd_24h_vol': p['usd_24h_vol']} if volume else {'usd': p['usd']})
+                for coin_id in ids if (p := recordings.prices.get(coin_id))
+            })
+        if path == '/fred/series/observations':
+            return self._reply(200, {'observations': [{'date': '2024-01-01', 'value': str(len(query['series_id'][0]) * 1.5)}]})
+        if path == '/fng/':
+            return self._reply(200, {'data': [{'value': '55', 'timestamp': '1704067200'}]})
+        if path == '/rss/feed.xml':
+            items = [(f"Article {i}", f"/articles/{i}") for i in range(ARTICLE_COUNT)]
+            return self._reply(200, rss(base, items), 'application/rss+xml')
+        if path == '/cryptopanic/rss/':
+            items = [(f"News {i}", f"/cryptopanic/news/{1000 + i}/story-{i}/") for i in range(CRYPTOPANIC_COUNT)]
+            return self._reply(200, rss(base, items), 'application/rss+xml')
+        if path.startswith('/cryptopanic/news/'):
+            news_id = int(path.split('/')[3])
+            return self._reply(302, headers=[('Location', f"{base}/articles/{news_id % ARTICLE_COUNT}")])
+        if path.startswith('/articles/'):
+            return self._reply(200, recordings.articles[int(path.rsplit('/', 1)[1])], 'text/html; charset=utf-8')
+        return self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        payload = self._body()
+        path = urlparse(self.path).path
+        if path == '/bls/publicAPI/v2/timeseries/data/':
+            series_ids = json.loads(payload)['seriesid']
+            return self._reply(200, {'status': 'REQUEST_SUCCEEDED', 'Results': {'series': [
+                {'seriesID': series_id, 'data': [{'year': '2024', 'period': 'M01', 'periodName': 'January',
+                                                  'value': str(100 + len(series_id))}]}
+                for series_id in series_ids]}})
+        if path.startswith('/telegram/') and path.endswith('/sendMessage'):
+            return self._reply(200, {'ok': True, 'result': {}})
+        return self._reply(404, {'error': 'not found'})
+
+
+@pytest.fixture(scope='session')
+def recordings():
+    return Recordings()
+
+
+@pytest.fixture(scope='session')
+def stand_in(recordings):
+    with serving(StandInHandler, recordings=recordings) as server:
+        base = server.url
+        # Modules read their endpoints and limits at import time, so these are set before any import
+        env = {
+            'COINGECKO_API_URL': f"{base}/coingecko",
+            'COINGECKO_CALLS_PER_MINUTE': '1000000',
+            'COINGECKO_BURST': '100',
+            'MARKET_DATA_TTL': '0',
+            'TELEGRAM_API_URL': f"{base}/telegram",
+            'TELEGRAM_BOT_TOKEN': 'bench',
+            'TELEGRAM_CHAT_ID': 'bench',
+            'TELEGRAM_MESSAGES_PER_MINUTE': '1000000',
+            'TELEGRAM_BATCH_DELAY': '0.01',
+            'RSS_FEED_URL': f"{base}/rss/feed.xml",
+            'CRYPTOPANIC_FEED_URL': f"{base}/cryptopanic/rss/",
+            'ARTICLE_HOST_CALLS_PER_MINUTE': '1000000',
+            'HTTP_MAX_RETRIES': '0',
+        }
+        saved = {name: os.environ.get(name) for name in env}
+        os.environ.update(env)
+        yield base
+        # Deliver queued alerts while the stand-in is still up
+        if 'notifier' in sys.modules:
+            sys.modules['notifier'].flush_all()
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Fresh working directory per round, so on-disk caches and stores start cold."""
+    rounds = iter(range(10 ** 6))
+
+    def fresh():
+        path = tmp_path / f"round-{next(rounds)}"
+        path.mkdir()
+        monkeypatch.chdir(path)
+        return path
+
+    fresh()
+    return fresh
+
+
+@pytest.fixture(scope='session')
+def kraken_recording():
+    # Recorded Kraken tickers and a week of daily candles for the USD universe, served through ReplayProvider
+    rng = random.Random(SEED)
+    symbols = [f"C{i}/USD" for i in range(USD_PAIRS)]
+    recording = {'markets': {}, 'tickers': {}, 'ohlcv': {}}
+    for symbol in symbols:
+        close, candles = rng.uniform(0.01, 1000), []
+        for day in range(7):
+            open_, close = close, close * rng.uniform(0.9, 1.12)
+            candles.append([86400000 * day, open_, max(open_, close) * 1.01, min(open_, close) * 0.99, close,
+                            rng.uniform(1e3, 1e6)])
+        recording['markets'][symbol] = {'symbol': symbol, 'active': True}
+        recording['tickers'][symbol] = {'symbol': symbol, 'last': close, 'percentage': (close / candles[-2][4] - 1) * 100,
+                                        'baseVolume': rng.uniform(1e3, 4e6), 'quoteVolume': rng.uniform(1e3, 1e8)}
+        recording['ohlcv'][symbol] = candles
+    return recording
@@ -0,0 +1,199 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib import recfunctions
+
+from storage import atomic_write_bytes
+
+# Local OHLCV history, one append-only file of fixed-width records per
+# exchange, timeframe and symbol, read back through np.memmap. Only closed
+# candles are stored; each update fetches from the last stored candle (or
+# from the oldest gap) onwards, so after warm-up a run needs at most one
+# small request per symbol and none when nothing has closed since the last
+# run. Replays and ad-hoc analysis can read the same files via ``frame()``.
+CANDLE_STORE_DIR = os.getenv('CANDLE_STORE_DIR', 'candles')
+# Candles fetched the first time a symbol is seen
+CANDLE_HISTORY = int(os.getenv('CANDLE_HISTORY', '60'))
+# Most exchanges cap a single OHLCV response around here (Kraken: 720)
+CANDLE_FETCH_LIMIT = int(os.getenv('CANDLE_FETCH_LIMIT', '720'))
+
+CANDLE_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                         ('close', '<f8'), ('volume', '<f8')])
+TIMEFRAME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def timeframe_ms(timeframe):
+    return int(timeframe[:-1] or 1) * TIMEFRAME_UNITS[timeframe[-1]] * 1000
+
+
+def period_start(timeframe, now_ms=None):
+    tf = timeframe_ms(timeframe)
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return now_ms - now_ms % tf
+
+
+def to_records(candles):
+    records = np.zeros(len(candles), dtype=CANDLE_DTYPE)
+    if len(candles):
+        values = np.asarray(candles, dtype=float)
+        records['time'] = values[:, 0].astype(np.int64)
+        for i, field in enumerate(CANDLE_DTYPE.names[1:], start=1):
+            records[field] = values[:, i]
+    return records
+
+
+def to_rows(records):
+    return recfunctions.structured_to_unstructured(records[list(CANDLE_DTYPE.names)], dtype=float)
+
+
+class CandleStore:
+    def __init__(self, exchange_id, root=CANDLE_STORE_DIR, history=CANDLE_HISTORY, fetch_limit=CANDLE_FETCH_LIMIT):
+        self.root = os.path.join(root, exchange_id)
+        self.history = history
+        self.fetch_limit = fetch_limit
+        self.lock = threading.Lock()
+        self._maps = {}
+        # Still-open candle per (symbol, timeframe) from this process's last fetch
+        self.live = {}
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.root, timeframe, symbol.replace('/', '_').replace(':', '_') + '.bin')
+
+    def read(self, symbol, timeframe):
+        """Stored closed candles as a read-only memory-mapped record array."""
+        path = self.path(symbol, timeframe)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < CANDLE_DTYPE.itemsize:
+            return np.zeros(0, dtype=CANDLE_DTYPE)
+        cached = self._maps.get(path)
+        if cached is None or cached[0] != size:
+            # Remap after every append or rewrite; the old map keeps pointing at the replaced file
+            cached = self._maps[path] = (size, np.memmap(path, dtype=CANDLE_DTYPE, mode='r',
+                                                        shape=(size // CANDLE_DTYPE.itemsize,)))
+        return cached[1]
+
+    def gaps(self, symbol, timeframe):
+        """``(first_missing, last_missing)`` open times of every hole in the stored series."""
+        times = self.read(symbol, timeframe)['time']
+        tf = timeframe_ms(timeframe)
+        holes = np.flatnonzero(np.diff(times) > tf)
+        return [(int(times[i]) + tf, int(times[i + 1]) - tf) for i in holes]
+
+    def write(self, symbol, timeframe, candles, now_ms=None):
+        """Store the closed candles among ``candles``; returns how many were new.
+
+        Candles after the last stored one are appended in place. Anything
+        older (a backfilled gap) triggers a merge and an atomic rewrite.
+        """
+        tf = timeframe_ms(timeframe)
+        records = to_records(candles)
+        records = records[records['time'] + tf <= (int(time.time() * 1000) if now_ms is None else now_ms)]
+        if not len(records):
+            return 0
+        path = self.path(symbol, timeframe)
+        with self.lock:
+            existing = self.read(symbol, timeframe)
+            last = existing['time'][-1] if len(existing) else None
+            if last is None or records['time'].min() > last:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                records = records[np.unique(records['time'], return_index=True)[1]]  # sorted, duplicates dropped
+                with open(path, 'ab') as file:
+                    file.write(records.tobytes())
+                return len(records)
+            new = records[~np.isin(records['time'], existing['time'])]
+            if not len(new):
+                return 0
+            merged = np.concatenate([np.asarray(existing), new])
+            merged = merged[np.unique(merged['time'], return_index=True)[1]]
+            atomic_write_bytes(path, merged.tobytes())
+            return len(new)
+
+    def fill_missing(self, symbol, timeframe, start, end):
+        # Periods the exchange has no candle for are stored as NaN rows, so they are not refetched forever
+        tf = timeframe_ms(timeframe)
+        expected = np.arange(start, end + 1, tf, dtype=np.int64)
+        missing = expected[~np.isin(expected, self.read(symbol, timeframe)['time'])]
+        if not len(missing):
+            return 0
+        filler = np.full((len(missing), 6), np.nan)
+        filler[:, 0] = missing
+        return self.write(symbol, timeframe, filler, now_ms=int(missing.max()) + tf)
+
+    def next_since(self, symbol, timeframe, now_ms=None):
+        """Open time to fetch from, or None when the stored series is complete up to the open candle."""
+        tf = timeframe_ms(timeframe)
+        current = period_start(timeframe, now_ms)
+        stored = self.read(symbol, timeframe)
+        earliest = current - self.history * tf
+        if not len(stored) or stored['time'][-1] < earliest:
+            return earliest
+        holes = [start for start, _ in self.gaps(symbol, timeframe) if start >= earliest]
+        since = holes[0] if holes else int(stored['time'][-1]) + tf
+        return since if since < current else None
+
+    def update(self, provider, symbols, timeframe='1d', now_ms=None):
+        """Bring ``symbols`` up to date through ``provider.ohlcv_many``; returns ``{symbol: exception}`` for failures.
+
+        Symbols needing the same start are fetched together, which after
+        warm-up is usually a single concurrent batch.
+        """
+        tf = timeframe_ms(timeframe)
+        current = period_start(timeframe, now_ms)
+        batches = {}
+        for symbol in dict.fromkeys(symbols):
+            since = self.next_since(symbol, timeframe, now_ms)
+            if since is not None:
+                batches.setdefault(since, []).append(symbol)
+
+        errors = {}
+        for since, batch in batches.items():
+            limit = min((current - since) // tf + 1, self.fetch_limit)
+            for symbol, candles in provider.ohlcv_many(batch, timeframe, limit, since=since).items():
+                if isinstance(candles, Exception):
+                    errors[symbol] = candles
+                    continue
+                self.write(symbol, timeframe, candles, now_ms)
+                open_candle = next((list(candle) for candle in candles if candle[0] >= current), None)
+                if open_candle is not None:
+                    self.live[(symbol, timeframe)] = open_candle
+                # Holes inside the fetched range have no data on the exchange. Trailing empty periods
+                # are only final when the response reaches the open candle.
+                covered = min(since + (limit - 1) * tf, current - tf)
+                stored = self.read(symbol, timeframe)
+                if not len(stored):
+                    continue
+                if open_candle is None:
+                    covered = min(covered, int(stored['time'][-1]))
+                # Nothing is filled before a new listing's first candle
+                filled = self.fill_missing(symbol, timeframe, max(since, int(stored['time'][0])), covered)
+                if filled:
+                    logging.debug(f"{symbol} {timeframe}: {filled} candles missing on the exchange")
+        if batches:
+            logging.info(f"Candle store: {sum(map(len, batches.values()))} of {len(symbols)} symbols fetched "
+                         f"in {len(batches)} batches, {len(errors)} failed")
+        return errors
+
+    def recent(self, symbol, timeframe, n, now_ms=None):
+        """The last ``n`` candles as an ``(n', 6)`` float array, ending with the open one.
+
+        The open candle comes from this process's last fetch; if it was not
+        fetched (the store was already complete) it is a NaN row.
+        """
+        current = period_start(timeframe, now_ms)
+        stored = self.read(symbol, timeframe)
+        closed = to_rows(stored[-(n - 1):]) if n > 1 and len(stored) else np.zeros((0, 6))
+        live = self.live.get((symbol, timeframe))
+        if live is None or live[0] != current:
+            live = [current] + [np.nan] * 5
+        return np.vstack([closed, np.asarray([live], dtype=float)])
+
+    def frame(self, symbol, timeframe):
+        """All stored candles as a DataFrame indexed by UTC open time."""
+        records = np.asarray(self.read(symbol, timeframe))
+        frame = pd.DataFrame(records)
+        frame.index = pd.to_datetime(frame.pop('time'), unit='ms', utc=True)
+        return frame
@@ -0,0 +1,102 @@
+import logging
+import os
+import time
+import zlib
+
+from storage import atomic_write_json, load_json
+
+# Persisted coin list with activity tiers. The list is refreshed on a timer
+# and diffed against the previous one, and each coin carries a poll interval
+# (in ticks): active coins are priced every tick, quiet ones back off.
+COIN_UNIVERSE_PATH = os.getenv('COIN_UNIVERSE_PATH', 'coin_universe.json')
+UNIVERSE_REFRESH_SECONDS = float(os.getenv('UNIVERSE_REFRESH_SECONDS', '3600'))
+# A coin is active if its 24h volume or its move since the last poll reaches these levels
+ACTIVE_VOLUME_USD = float(os.getenv('ACTIVE_VOLUME_USD', '100000'))
+ACTIVE_CHANGE = float(os.getenv('ACTIVE_CHANGE', '0.02'))
+MAX_POLL_INTERVAL = int(os.getenv('MAX_POLL_INTERVAL', '32'))
+
+
+class CoinUniverse:
+    def __init__(self, path=COIN_UNIVERSE_PATH, refresh_interval=UNIVERSE_REFRESH_SECONDS,
+                 max_poll_interval=MAX_POLL_INTERVAL):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.max_poll_interval = max_poll_interval
+        state = load_json(path, {}) if path else {}
+        self.coins = {coin['id']: coin for coin in state.get('coins', [])}
+        self.refreshed_at = state.get('refreshed_at', 0)
+        self.intervals = {coin_id: 1 for coin_id in self.coins}
+        self.intervals.update((k, v) for k, v in state.get('intervals', {}).items() if k in self.coins)
+        # Tick at which each coin is next due; everything is due on the first tick after a start
+        self.next_due = {}
+
+    def __len__(self):
+        return len(self.coins)
+
+    def is_stale(self, now=None):
+        return (now or time.time()) - self.refreshed_at >= self.refresh_interval
+
+    def refresh(self, fetch_coins, force=False):
+        """Reload the coin list if stale; returns ``(added, removed)`` ids.
+
+        An empty response (e.g. a failed request) leaves the universe unchanged.
+        """
+        if not force and self.coins and not self.is_stale():
+            return [], []
+        coins = fetch_coins()
+        if not coins:
+            return [], []
+        latest = {coin['id']: coin for coin in coins}
+        added = [coin_id for coin_id in latest if coin_id not in self.coins]
+        removed = [coin_id for coin_id in self.coins if coin_id not in latest]
+        self.coins = latest
+        for coin_id in added:
+            self.intervals[coin_id] = 1  # new listings start in the active tier
+        for coin_id in removed:
+            self.intervals.pop(coin_id, None)
+            self.next_due.pop(coin_id, None)
+        self.refreshed_at = time.time()
+        if added or removed:
+            logging.info(f"Coin universe: {len(added)} added, {len(removed)} removed, {len(self.coins)} total")
+        self.save()
+        return added, removed
+
+    def due(self, tick):
+        return [coin_id for coin_id in self.coins if self.next_due.get(coin_id, 0) <= tick]
+
+    def record(self, tick, polled, previous_prices=None):
+        """Update tiers from one poll; ``polled`` maps id -> CoinGecko price entry.
+
+        Active coins return to every-tick polling, quiet ones double their
+        interval up to ``max_poll_interval``. Ids that came back without a
+        price (e.g. their batch failed) keep their interval and stay due.
+        """
+        previous_prices = previous_prices or {}
+        for coin_id in polled:
+            entry = polled[coin_id] or {}
+            price = entry.get('usd')
+            if price is None:
+                continue
+            previous = previous_prices.get(coin_id)
+            active = (entry.get('usd_24h_vol') or 0) >= ACTIVE_VOLUME_USD or (
+                previous and abs(price / previous - 1) >= ACTIVE_CHANGE)
+            interval = 1 if active else min(self.intervals.get(coin_id, 1) * 2, self.max_poll_interval)
+            self.intervals[coin_id] = interval
+            # A stable per-coin offset spreads quiet coins across ticks instead of polling them in one burst
+            self.next_due[coin_id] = tick + interval - (zlib.crc32(coin_id.encode()) % interval) // 2
+
+    def tier_counts(self):
+        counts = {}
+        for interval in self.intervals.values():
+            counts[interval] = counts.get(interval, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        atomic_write_json(path, {
+            'refreshed_at': self.refreshed_at,
+            'coins': list(self.coins.values()),
+            'intervals': self.intervals,
+        })
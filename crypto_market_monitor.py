@@ -1,15 +1,24 @@
 import os
-import requests
 import logging
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import http_cache
+import http_client
+import metrics
+import notifier
+import release_schedule
+from indicator_rules import describe_change
+from indicator_store import IndicatorStore
+from storage import atomic_write_json, load_json
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s', handlers=[
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), format='%(asctime)s - %(levelname)s - %(message)s', handlers=[
     logging.FileHandler("news_economic_log.txt", mode='a'),  # Append to log file
     logging.StreamHandler()
 ])
@@ -18,18 +27,17 @@ logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %
 def initialize_data_file():
     if not os.path.exists("news_economic.json") or os.path.getsize("news_economic.json") == 0:
         logging.debug("Initializing news_economic.json with empty data structure.")
-        with open("news_economic.json", 'w') as file:
-            empty_data = {
-                "Unemployment Rate": {"value": None, "date": None},
-                "Real GDP (FRED)": {"value": None, "date": None},
-                "Consumer Price Index (CPI)": {"value": None, "date": None},
-                "Fed Interest Rate Policy": {"value": None, "date": None},
-                "Producer Price Index (PPI)": {"value": None, "date": None},
-                "Non-Farm Payroll Report": {"value": None, "date": None},
-                "Retail Sales Data": {"value": None, "date": None},
-                "Fear and Greed Index": {"value": None, "date": None},
-            }
-            json.dump(empty_data, file, ensure_ascii=False, indent=4)
+        empty_data = {
+            "Unemployment Rate": {"value": None, "date": None},
+            "Real GDP (FRED)": {"value": None, "date": None},
+            "Consumer Price Index (CPI)": {"value": None, "date": None},
+            "Fed Interest Rate Policy": {"value": None, "date": None},
+            "Producer Price Index (PPI)": {"value": None, "date": None},
+            "Non-Farm Payroll Report": {"value": None, "date": None},
+            "Retail Sales Data": {"value": None, "date": None},
+            "Fear and Greed Index": {"value": None, "date": None},
+        }
+        atomic_write_json("news_economic.json", empty_data, indent=4)
         logging.debug("news_economic.json initialized successfully.")
 
 initialize_data_file()
@@ -44,232 +52,218 @@ FEAR_GREED_INDEX_API = "https://api.alternative.me/fng/?limit=1"
 BLS_BASE_URL = 'https://api.bls.gov/publicAPI/v2/timeseries/data/'
 FRED_BASE_URL = 'https://api.stlouisfed.org/fred/series/observations'
 NEWS_FILE_PATH = 'news_economic.json'
+INDICATOR_STATE_PATH = os.getenv('INDICATOR_STATE_PATH', 'indicator_state.json')
+# Upstream responses are cached on disk; inside a release window we re-check every RECHECK minutes
+RECHECK_INTERVAL = timedelta(minutes=float(os.getenv('INDICATOR_RECHECK_MINUTES', '15')))
+FRED_CACHE_TTL = float(os.getenv('FRED_CACHE_TTL', '600'))
+FEAR_GREED_CACHE_TTL = float(os.getenv('FEAR_GREED_CACHE_TTL', '3600'))
+
+response_cache = http_cache.ResponseCache()
 
 # Helper function to get the current time in UTC+8
 def get_utc_plus_8_time():
     utc_plus_8 = timezone(timedelta(hours=8))
     return datetime.now(utc_plus_8).strftime("%Y-%m-%d %H:%M:%S")
 
-# Helper function to send messages to Telegram
+# Helper function to send messages to Telegram (queued and batched by notifier)
 def send_message_to_telegram(message):
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "disable_notification": True
-    }
-    try:
-        response = requests.post(url, json=payload)
-        if response.status_code == 200:
-            logging.info("Message sent to Telegram successfully.")
-        else:
-            logging.error(f"Failed to send message to Telegram: {response.text}")
-    except Exception as e:
-        logging.error(f"Error sending message to Telegram: {e}")
+    notifier.notify(message, token=TELEGRAM_BOT_TOKEN, chat_id=TELEGRAM_CHAT_ID, disable_notification=True)
 
-# Fetch data functions for various indicators
-def get_unemployment_rate():
-    series_id = 'LNS14000000'
-    url = f"{BLS_BASE_URL}"
+# Series behind each indicator; all BLS series go out in one batched request
+BLS_SERIES = {
+    'Unemployment Rate': 'LNS14000000',
+    'Consumer Price Index (CPI)': 'CUSR0000SA0',
+    'Producer Price Index (PPI)': 'WPU00000000',
+    'Non-Farm Payroll Report': 'CES0000000001',
+}
+FRED_SERIES = {
+    'Real GDP (FRED)': 'GDPC1',
+    'Fed Interest Rate Policy': 'FEDFUNDS',
+    'Retail Sales Data': 'RSAFS',
+}
+INDICATOR_ORDER = [
+    'Unemployment Rate',
+    'Real GDP (FRED)',
+    'Consumer Price Index (CPI)',
+    'Fed Interest Rate Policy',
+    'Producer Price Index (PPI)',
+    'Non-Farm Payroll Report',
+    'Retail Sales Data',
+    'Fear and Greed Index',
+]
+FETCH_WORKERS = int(os.getenv('INDICATOR_FETCH_WORKERS', '8'))
+
+# Fetch the latest observation of several BLS series with a single POST
+def fetch_bls_series(series_ids):
     headers = {'Content-type': 'application/json'}
     current_year = str(datetime.now().year)
-    data = json.dumps({"seriesid": [series_id], "startyear": current_year, "endyear": current_year, "registrationkey": BLS_API_KEY})
-    response = requests.post(url, data=data, headers=headers)
-    
+    data = json.dumps({"seriesid": list(series_ids), "startyear": current_year, "endyear": current_year, "registrationkey": BLS_API_KEY})
+    response = http_client.post(BLS_BASE_URL, data=data, headers=headers)
+
+    latest = {}
     if response.status_code == 200:
         result = response.json()
-        logging.debug(f"Fetched unemployment rate data: {result}")
-        if 'Results' in result and 'series' in result['Results'] and len(result['Results']['series']) > 0:
-            series_data = result['Results']['series'][0]['data']
+        logging.debug(f"Fetched BLS data for {len(result.get('Results', {}).get('series', []))} series")
+        for series in result.get('Results', {}).get('series', []):
+            series_data = series.get('data', [])
             if len(series_data) > 0:
-                logging.info("Unemployment Rate fetched successfully.")
-                return float(series_data[0]['value']), f"{series_data[0]['year']}年 {series_data[0]['periodName']}"
-    logging.error(f"Failed to fetch Unemployment Rate data: {response.status_code} {response.text}")
-    return None, None
+                latest[series['seriesID']] = (float(series_data[0]['value']), f"{series_data[0]['year']}年 {series_data[0]['periodName']}")
+                logging.info(f"BLS {series['seriesID']} fetched successfully.")
+    missing = [series_id for series_id in series_ids if series_id not in latest]
+    if missing:
+        logging.error(f"Failed to fetch BLS series {missing}: {response.status_code} {response.text}")
+    return latest
 
-def get_real_gdp():
+def get_fred_series(series_id):
     params = {
-        'series_id': 'GDPC1',
+        'series_id': series_id,
         'api_key': FRED_API_KEY,
         'file_type': 'json',
         'limit': 1,
         'sort_order': 'desc'
     }
-    response = requests.get(FRED_BASE_URL, params=params)
+    response = response_cache.get_url(FRED_BASE_URL, FRED_CACHE_TTL, params=params)
     if response.status_code == 200:
         result = response.json()
-        logging.debug(f"Fetched real GDP data: {result}")
+        logging.debug(f"Fetched FRED {series_id} data ({len(result.get('observations', []))} observations)")
         if 'observations' in result and len(result['observations']) > 0:
-            logging.info("Real GDP fetched successfully.")
+            logging.info(f"FRED {series_id} fetched successfully.")
             return float(result['observations'][0]['value']), result['observations'][0]['date']
-    logging.error(f"Failed to fetch Real GDP data: {response.status_code} {response.text}")
+    logging.error(f"Failed to fetch FRED {series_id} data: {response.status_code} {response.text}")
     return None, None
 
+# Fetch data functions for various indicators
+def get_unemployment_rate():
+    return fetch_bls_series([BLS_SERIES['Unemployment Rate']]).get(BLS_SERIES['Unemployment Rate'], (None, None))
+
+def get_real_gdp():
+    return get_fred_series(FRED_SERIES['Real GDP (FRED)'])
+
 def get_cpi():
-    series_id = 'CUSR0000SA0'
-    url = f"{BLS_BASE_URL}"
-    headers = {'Content-type': 'application/json'}
-    data = json.dumps({"seriesid": [series_id], "startyear": str(datetime.now().year), "endyear": str(datetime.now().year), "registrationkey": BLS_API_KEY})
-    response = requests.post(url, data=data, headers=headers)
-    
-    if response.status_code == 200:
-        result = response.json()
-        logging.debug(f"Fetched CPI data: {result}")
-        if 'Results' in result and 'series' in result['Results'] and len(result['Results']['series']) > 0:
-            series_data = result['Results']['series'][0]['data']
-            if len(series_data) > 0:
-                logging.info("CPI fetched successfully.")
-                return float(series_data[0]['value']), f"{series_data[0]['year']}年 {series_data[0]['periodName']}"
-    logging.error(f"Failed to fetch CPI data: {response.status_code} {response.text}")
-    return None, None
+    return fetch_bls_series([BLS_SERIES['Consumer Price Index (CPI)']]).get(BLS_SERIES['Consumer Price Index (CPI)'], (None, None))
 
 def get_fed_interest_rate():
-    params = {
-        'series_id': 'FEDFUNDS',
-        'api_key': FRED_API_KEY,
-        'file_type': 'json',
-        'limit': 1,
-        'sort_order': 'desc'
-    }
-    response = requests.get(FRED_BASE_URL, params=params)
-    if response.status_code == 200:
-        result = response.json()
-        logging.debug(f"Fetched Fed interest rate data: {result}")
-        if 'observations' in result and len(result['observations']) > 0:
-            logging.info("Fed Interest Rate fetched successfully.")
-            return float(result['observations'][0]['value']), result['observations'][0]['date']
-    logging.error(f"Failed to fetch Fed Interest Rate data: {response.status_code} {response.text}")
-    return None, None
+    return get_fred_series(FRED_SERIES['Fed Interest Rate Policy'])
 
 def get_ppi():
-    series_id = 'WPU00000000'
-    url = f"{BLS_BASE_URL}"
-    headers = {'Content-type': 'application/json'}
-    data = json.dumps({"seriesid": [series_id], "startyear": str(datetime.now().year), "endyear": str(datetime.now().year), "registrationkey": BLS_API_KEY})
-    response = requests.post(url, data=data, headers=headers)
-    
-    if response.status_code == 200:
-        result = response.json()
-        logging.debug(f"Fetched PPI data: {result}")
-        if 'Results' in result and 'series' in result['Results'] and len(result['Results']['series']) > 0:
-            series_data = result['Results']['series'][0]['data']
-            if len(series_data) > 0:
-                logging.info("PPI fetched successfully.")
-                return float(series_data[0]['value']), f"{series_data[0]['year']}年 {series_data[0]['periodName']}"
-        logging.error(f"Failed to fetch PPI data: {response.status_code} {response.text}")
-    return None, None
+    return fetch_bls_series([BLS_SERIES['Producer Price Index (PPI)']]).get(BLS_SERIES['Producer Price Index (PPI)'], (None, None))
 
 def get_non_farm_payroll():
-    series_id = 'CES0000000001'
-    url = f"{BLS_BASE_URL}"
-    headers = {'Content-type': 'application/json'}
-    data = json.dumps({"seriesid": [series_id], "startyear": str(datetime.now().year), "endyear": str(datetime.now().year), "registrationkey": BLS_API_KEY})
-    response = requests.post(url, data=data, headers=headers)
-    
-    if response.status_code == 200:
-        result = response.json()
-        logging.debug(f"Fetched non-farm payroll data: {result}")
-        if 'Results' in result and 'series' in result['Results'] and len(result['Results']['series']) > 0:
-            series_data = result['Results']['series'][0]['data']
-            if len(series_data) > 0:
-                logging.info("Non-Farm Payroll fetched successfully.")
-                return float(series_data[0]['value']), f"{series_data[0]['year']}年 {series_data[0]['periodName']}"
-    logging.error(f"Failed to fetch Non-Farm Payroll data: {response.status_code} {response.text}")
-    return None, None
+    return fetch_bls_series([BLS_SERIES['Non-Farm Payroll Report']]).get(BLS_SERIES['Non-Farm Payroll Report'], (None, None))
 
 def get_retail_sales():
-    params = {
-        'series_id': 'RSAFS',
-        'api_key': FRED_API_KEY,
-        'file_type': 'json',
-        'limit': 1,
-        'sort_order': 'desc'
-    }
-    response = requests.get(FRED_BASE_URL, params=params)
-    if response.status_code == 200:
-        result = response.json()
-        logging.debug(f"Fetched retail sales data: {result}")
-        if 'observations' in result and len(result['observations']) > 0:
-            logging.info("Retail Sales fetched successfully.")
-            return float(result['observations'][0]['value']), result['observations'][0]['date']
-    logging.error(f"Failed to fetch Retail Sales data: {response.status_code} {response.text}")
-    return None, None
+    return get_fred_series(FRED_SERIES['Retail Sales Data'])
 
 def get_fear_greed_index():
-    response = requests.get(FEAR_GREED_INDEX_API)
+    response = response_cache.get_url(FEAR_GREED_INDEX_API, FEAR_GREED_CACHE_TTL)
     if response.status_code == 200:
         result = response.json()
-        logging.debug(f"Fetched fear and greed index data: {result}")
+        logging.debug(f"Fetched fear and greed index data ({len(result.get('data', []))} points)")
         if 'data' in result and len(result['data']) > 0:
             logging.info("Fear and Greed Index fetched successfully.")
             return float(result['data'][0]['value']), result['data'][0]['timestamp']
     logging.error(f"Failed to fetch Fear and Greed Index data: {response.status_code} {response.text}")
     return None, None
 
+# Run one upstream call, recording how long it took; failures count as missing data
+def timed_fetch(source, fetch, *args):
+    started = time.monotonic()
+    try:
+        with metrics.stage('macro.fetch', source=source):
+            return fetch(*args)
+    except Exception as e:
+        logging.error(f"Error fetching {source}: {e}")
+        return None
+    finally:
+        logging.info(f"{source} responded in {time.monotonic() - started:.2f}s")
+
+# Fetch the requested indicators concurrently: one BLS batch, each FRED series and Fear & Greed
+def fetch_indicators(keys=INDICATOR_ORDER):
+    started = time.monotonic()
+    bls_keys = [key for key in keys if key in BLS_SERIES]
+    results = {}
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        bls_future = None
+        if bls_keys:
+            bls_future = executor.submit(timed_fetch, 'BLS', fetch_bls_series, [BLS_SERIES[key] for key in bls_keys])
+        fred_futures = {
+            key: executor.submit(timed_fetch, f"FRED {series_id}", get_fred_series, series_id)
+            for key, series_id in FRED_SERIES.items() if key in keys
+        }
+        fear_greed_future = None
+        if 'Fear and Greed Index' in keys:
+            fear_greed_future = executor.submit(timed_fetch, 'Fear and Greed Index', get_fear_greed_index)
+
+        if bls_future:
+            bls_results = bls_future.result() or {}
+            for key in bls_keys:
+                results[key] = bls_results.get(BLS_SERIES[key], (None, None))
+        for key, future in fred_futures.items():
+            results[key] = future.result() or (None, None)
+        if fear_greed_future:
+            results['Fear and Greed Index'] = fear_greed_future.result() or (None, None)
+
+    response_cache.save()
+    metrics.items('macro.fetch', len(results))
+    logging.info(f"Fetched {len(results)} indicators in {time.monotonic() - started:.2f}s")
+    return {key: results[key] for key in INDICATOR_ORDER if key in results}
+
+# Per-indicator bookkeeping for the release calendar, stored as ISO timestamps
+def load_indicator_state():
+    raw = load_json(INDICATOR_STATE_PATH, {}) or {}
+    return {
+        key: {field: datetime.fromisoformat(value) if value else None for field, value in entry.items()}
+        for key, entry in raw.items()
+    }
+
+def save_indicator_state(state):
+    atomic_write_json(INDICATOR_STATE_PATH, {
+        key: {field: value.isoformat() if value else None for field, value in entry.items()}
+        for key, entry in state.items()
+    }, indent=4)
+
+def due_indicators(state, now):
+    return [
+        key for key in INDICATOR_ORDER
+        if release_schedule.is_due(release_schedule.RELEASE_SCHEDULE[key], state.get(key, {}), now, recheck=RECHECK_INTERVAL)
+    ]
+
+# Load the latest value per indicator, seeding the store from news_economic.json on first use
+def load_previous_data(store):
+    if store.is_empty():
+        snapshot = load_json(NEWS_FILE_PATH, {}) or {}
+        if store.import_snapshot(snapshot):
+            logging.info("Imported existing news_economic.json into the indicator store.")
+    return store.latest()
+
 def check_and_log_data():
-    prev_data = {}
-    # Read previous data from file if exists
-    if os.path.exists(NEWS_FILE_PATH) and os.path.getsize(NEWS_FILE_PATH) > 0:
-        try:
-            with open(NEWS_FILE_PATH, 'r') as file:
-                prev_data = json.load(file)
-                logging.info("Previous data loaded successfully.")
-        except json.JSONDecodeError as e:
-            logging.error(f"Failed to parse previous data file: {e}")
-            prev_data = {}  # Reset to empty if parsing fails
-    else:
-        logging.info("news_economic.json does not exist or is empty, initializing with empty data structure.")
-        
+    with metrics.stage('macro'), IndicatorStore() as store:
+        prev_data = load_previous_data(store)
+        logging.info(f"Loaded latest values for {len(prev_data)} indicators from the indicator store.")
+        check_indicators(store, prev_data)
+
+def check_indicators(store, prev_data):
+    # Only call upstream for indicators inside (or just past) their release window
+    now = datetime.now(timezone.utc)
+    indicator_state = load_indicator_state()
+    due = due_indicators(indicator_state, now)
+    if not due:
+        logging.info("No indicator is due for release, skipping upstream calls.")
+        return
+    logging.info(f"Indicators due for a check: {due}")
+
     # Fetch current data
-    indicators = {
-        'Unemployment Rate': get_unemployment_rate(),
-        'Real GDP (FRED)': get_real_gdp(),
-        'Consumer Price Index (CPI)': get_cpi(),
-        'Fed Interest Rate Policy': get_fed_interest_rate(),
-        'Producer Price Index (PPI)': get_ppi(),
-        'Non-Farm Payroll Report': get_non_farm_payroll(),
-        'Retail Sales Data': get_retail_sales(),
-        'Fear and Greed Index': get_fear_greed_index()
-    }
+    indicators = fetch_indicators(due)
+    for key, (current_value, _) in indicators.items():
+        if current_value is not None:
+            entry = indicator_state.setdefault(key, {'checked_at': None, 'released_at': None})
+            entry['checked_at'] = now
+            if prev_data.get(key, {}).get('value') != current_value:
+                entry['released_at'] = now
+    save_indicator_state(indicator_state)
 
     updated_indicators = []  # To keep track of updated indicators
 
-    # Define the influence of each indicator
-    influence = {
-        'Unemployment Rate': {
-            'increase': "行情利空，对币市看空 😔",
-            'decrease': "行情利好，对币市看多 🙂"
-        },
-        'Real GDP (FRED)': {
-            'increase': "对经济有利，风险较大，对币市看多 🙂",
-            'decrease': "对经济不利，风险较大，对币市看空 😔"
-        },
-        'Consumer Price Index (CPI)': {
-            'increase': "对抗通胀有利，对币市看多 🙂",
-            'decrease': "通胀减少无明显影响 😐"
-        },
-        'Fed Interest Rate Policy': {
-            'increase': "利率上升，对币市看空 😔",
-            'decrease': "利率下降，对币市看多 🙂"
-        },
-        'Producer Price Index (PPI)': {
-            'increase': "对抗通胀有利，对币市看多 🙂",
-            'decrease': "生产成本下降无明显影响 😐"
-        },
-        'Non-Farm Payroll Report': {
-            'increase': "就业增加，对币市看多 🙂",
-            'decrease': "就业减少，对币市看空 😔"
-        },
-        'Retail Sales Data': {
-            'increase': "消费增加，对币市看多 🙂",
-            'decrease': "消费减少，对币市看空 😔"
-        },
-        'Fear and Greed Index': {
-            'increase': "市场恐惧减弱，对币市看多 🙂",
-            'decrease': "市场恐惧增强，对币市看空 😔"
-        }
-    }
-
     # Compare current data with previous data and send updates
     new_data = {}
     for key, (current_value, date) in indicators.items():
@@ -280,11 +274,7 @@ def check_and_log_data():
                     'value': current_value,
                     'date': date
                 }
-                direction = "increase" if prev_value is not None and current_value > prev_value else "decrease"
-                impact = influence[key][direction]
-                timestamp = get_utc_plus_8_time()
-                prev_value_display = prev_value if prev_value is not None else '无记录的'
-                change_message = f"{key} 更新: 由 {prev_value_display} 变为 {current_value} ({'📈 增加' if direction == 'increase' else '📉 减少'}, {impact})"
+                change_message = describe_change(key, prev_value, current_value)
                 
                 send_message_to_telegram(change_message)
                 logging.info(change_message)
@@ -292,12 +282,14 @@ def check_and_log_data():
             else:
                 logging.info(f"No change in {key}, skipping update.")
 
-    # Update the data file only if there are changes
+    # Append changes to the history store and refresh the snapshot only if there are changes
     if updated_indicators:
-        updated_data = {**prev_data, **new_data}  # Merge previous data with new data
+        store.append({key: (entry['value'], entry['date']) for key, entry in new_data.items()})
+        snapshot = load_json(NEWS_FILE_PATH, {}) or {}
+        for key, entry in store.latest().items():
+            snapshot[key] = {'value': entry['value'], 'date': entry['date']}
         logging.info("Updating news_economic.json with new data.")
-        with open(NEWS_FILE_PATH, 'w') as file:
-            json.dump(updated_data, file, ensure_ascii=False, indent=4)
+        atomic_write_json(NEWS_FILE_PATH, snapshot, indent=4)
     else:
         logging.info("No changes detected in indicators, not updating news_economic.json.")
 
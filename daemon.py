@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+import random
+import signal
+import time
+
+import metrics
+
+# Long-running host for every monitor. Jobs run as scheduled asyncio tasks in
+# one process, so sessions, exchange metadata, NLP models and price history
+# stay warm between runs instead of being rebuilt by a cron process each time.
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', handlers=[
+    logging.FileHandler("daemon_log.txt", mode='a'),
+    logging.StreamHandler()
+])
+
+# 'stream' (WebSocket price ingestion) is opt-in and not part of the default set
+DAEMON_JOBS = [job.strip() for job in os.getenv('DAEMON_JOBS', 'macro,prices,market,transfers,news').split(',') if job.strip()]
+STATE_DIR = os.getenv('DAEMON_STATE_DIR', 'state')
+CHECKPOINT_INTERVAL = float(os.getenv('DAEMON_CHECKPOINT_INTERVAL', '300'))
+JOB_JITTER = float(os.getenv('DAEMON_JOB_JITTER', '0.1'))  # fraction of the interval
+PRICE_INTERVAL = float(os.getenv('PRICE_INTERVAL', '60'))
+STREAM_RESTART_DELAY = float(os.getenv('DAEMON_STREAM_RESTART_DELAY', '10'))
+PRICE_WINDOWS = [int(w) for w in os.getenv('PRICE_WINDOWS', '5').split(',') if w.strip()]
+
+
+class Job:
+    def __init__(self, name, func, interval, jitter=JOB_JITTER):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.task = None
+        self.runs = 0
+        self.skipped = 0
+
+    def is_running(self):
+        return self.task is not None and not self.task.done()
+
+    def _run(self):
+        # Timed (and optionally profiled) inside the worker thread that does the work
+        with metrics.job(self.name):
+            self.func()
+
+    async def run_once(self):
+        started = time.monotonic()
+        try:
+            await asyncio.to_thread(self._run)
+        except Exception:
+            logging.exception(f"Job {self.name} failed")
+        finally:
+            self.runs += 1
+            logging.info(f"Job {self.name} finished in {time.monotonic() - started:.2f}s")
+
+    async def schedule(self, stop):
+        loop = asyncio.get_running_loop()
+        # Spread the first runs out so jobs sharing an interval don't start together
+        next_run = loop.time() + random.uniform(0, self.jitter * self.interval)
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=max(0, next_run - loop.time()))
+                break
+            except asyncio.TimeoutError:
+                pass
+            if self.is_running():
+                self.skipped += 1
+                metrics.inc('job_skipped_total', job=self.name)
+                logging.warning(f"Job {self.name} is still running, skipping this run")
+            else:
+                self.task = asyncio.create_task(self.run_once())
+            next_run += self.interval + random.uniform(-self.jitter, self.jitter) * self.interval
+        if self.is_running():
+            await self.task
+
+
+def build_jobs():
+    jobs = []
+    checkpoints = []
+    streams = []
+    os.makedirs(STATE_DIR, exist_ok=True)
+
+    if 'macro' in DAEMON_JOBS:
+        import crypto_market_monitor
+        jobs.append(Job('macro', crypto_market_monitor.check_and_log_data, 300))
+
+    if 'prices' in DAEMON_JOBS:
+        import monitor
+        state_path = os.path.join(STATE_DIR, 'price_history.npz')
+        price_monitor = monitor.PriceMonitor(PRICE_INTERVAL, windows=PRICE_WINDOWS, state_path=state_path)
+        # The price sweep must keep its cadence, so it gets no jitter
+        jobs.append(Job('prices', price_monitor.tick, PRICE_INTERVAL, jitter=0))
+        checkpoints.append(lambda: price_monitor.save_state(state_path))
+
+    if 'market' in DAEMON_JOBS:
+        import market_conditions
+        jobs.append(Job('market', market_conditions.main, 300))
+
+    if 'transfers' in DAEMON_JOBS:
+        import large_transfer_monitor
+        jobs.append(Job('transfers', large_transfer_monitor.check_and_log_data, 600))
+
+    if 'news' in DAEMON_JOBS:
+        from script_loader import load_news_module
+        jobs.append(Job('news', load_news_module().main, 900))
+
+    # Opt-in: WebSocket ticker ingestion runs continuously rather than on a schedule
+    if 'stream' in DAEMON_JOBS:
+        import price_stream
+        symbols = price_stream.default_symbols()
+        stream_monitor = price_stream.StreamMonitor()
+        streams.append(('stream', lambda stop: price_stream.stream_prices(symbols, stream_monitor, stop)))
+
+    # Metrics snapshots go out with every checkpoint (a no-op unless METRICS_PATH is set)
+    checkpoints.append(metrics.export)
+    return jobs, checkpoints, streams
+
+
+# A stream that raises is logged and restarted; it never takes the scheduled jobs down with it
+async def supervise(name, stream, stop, restart_delay=STREAM_RESTART_DELAY):
+    while not stop.is_set():
+        try:
+            await stream(stop)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            metrics.inc('stream_restarts_total', stream=name)
+            logging.exception(f"Stream {name} failed, restarting in {restart_delay:g}s")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=restart_delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+def save_checkpoints(checkpoints):
+    for checkpoint in checkpoints:
+        try:
+            checkpoint()
+        except Exception:
+            logging.exception("Failed to write checkpoint")
+
+
+async def run(jobs, checkpoints, streams=()):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    if checkpoints:
+        jobs = jobs + [Job('checkpoint', lambda: save_checkpoints(checkpoints), CHECKPOINT_INTERVAL, jitter=0)]
+    logging.info(f"Daemon started with jobs: {[job.name for job in jobs]}")
+    await asyncio.gather(*(job.schedule(stop) for job in jobs), *(supervise(name, stream, stop) for name, stream in streams))
+
+    # Persist in-memory state once more on the way out
+    await asyncio.to_thread(save_checkpoints, checkpoints)
+    logging.info("Daemon stopped")
+
+
+if __name__ == "__main__":
+    jobs, checkpoints, streams = build_jobs()
+    asyncio.run(run(jobs, checkpoints, streams))
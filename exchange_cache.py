@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+import time
+
+import ccxt
+
+from storage import atomic_write_json, load_json
+
+# On-disk cache of exchange market metadata so a run does not have to call
+# load_markets() against the exchange before doing anything useful.
+MARKETS_CACHE_DIR = os.getenv('MARKETS_CACHE_DIR', 'cache')
+MARKETS_CACHE_TTL = float(os.getenv('MARKETS_CACHE_TTL', str(6 * 3600)))
+# Point at a cache-format JSON file to run entirely offline (tests, replays)
+MARKETS_FIXTURE = os.getenv('MARKETS_FIXTURE')
+CACHE_VERSION = 1
+
+_exchanges = {}
+_refreshing = set()
+_lock = threading.Lock()
+
+
+def cache_path(exchange_id):
+    return os.path.join(MARKETS_CACHE_DIR, f"markets_{exchange_id}.json")
+
+
+def read_cache(exchange_id, path=None):
+    entry = load_json(path or cache_path(exchange_id))
+    if not entry:
+        return None
+    # Entries written by another cache layout or ccxt release are rebuilt
+    if entry.get('version') != CACHE_VERSION or entry.get('ccxt_version') != ccxt.__version__:
+        logging.info(f"Ignoring outdated market cache for {exchange_id}")
+        return None
+    return entry
+
+
+def write_cache(exchange):
+    os.makedirs(MARKETS_CACHE_DIR, exist_ok=True)
+    atomic_write_json(cache_path(exchange.id), {
+        'version': CACHE_VERSION,
+        'ccxt_version': ccxt.__version__,
+        'exchange': exchange.id,
+        'fetched_at': time.time(),
+        'markets': exchange.markets,
+        'currencies': exchange.currencies,
+    })
+
+
+def refresh_markets(exchange):
+    markets = exchange.load_markets(reload=True)
+    write_cache(exchange)
+    return markets
+
+
+def _refresh_in_background(exchange):
+    with _lock:
+        if exchange.id in _refreshing:
+            return
+        _refreshing.add(exchange.id)
+
+    def run():
+        try:
+            # Refresh on a separate instance so the live one is swapped in one step
+            fresh = getattr(ccxt, exchange.id)()
+            refresh_markets(fresh)
+            exchange.set_markets(fresh.markets, fresh.currencies)
+            logging.info(f"Refreshed market cache for {exchange.id}")
+        except Exception as e:
+            logging.error(f"Background market refresh for {exchange.id} failed: {e}")
+        finally:
+            with _lock:
+                _refreshing.discard(exchange.id)
+
+    threading.Thread(target=run, name=f"markets-{exchange.id}", daemon=True).start()
+
+
+def load_markets_cached(exchange, ttl=MARKETS_CACHE_TTL, fixture=MARKETS_FIXTURE):
+    """Populate ``exchange.markets`` from the fixture or disk cache, hitting the network only when cold.
+
+    A stale cache is still used immediately and refreshed in the background.
+    """
+    if fixture:
+        entry = load_json(fixture)
+        exchange.set_markets(entry['markets'], entry.get('currencies'))
+        return exchange.markets
+
+    entry = read_cache(exchange.id)
+    if entry is None:
+        return refresh_markets(exchange)
+
+    exchange.set_markets(entry['markets'], entry.get('currencies'))
+    if time.time() - entry['fetched_at'] > ttl:
+        _refresh_in_background(exchange)
+    return exchange.markets
+
+
+def get_exchange(exchange_id='kraken'):
+    """Return a shared ccxt exchange with markets loaded, creating it on first use."""
+    with _lock:
+        exchange = _exchanges.get(exchange_id)
+    if exchange is not None:
+        return exchange
+    exchange = getattr(ccxt, exchange_id)()
+    load_markets_cached(exchange)
+    with _lock:
+        return _exchanges.setdefault(exchange_id, exchange)
@@ -0,0 +1,133 @@
+import calendar
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import feedparser
+
+import http_client
+import metrics
+from storage import atomic_write_json, load_json
+
+# Incremental RSS/Atom polling. Each feed's ETag / Last-Modified is kept so
+# unchanged feeds cost one conditional GET answered with 304 and no parsing,
+# and recently seen entry GUIDs plus the newest publish time are kept so only
+# entries that were not handled before are returned. Nothing is remembered
+# until the caller reports an entry as handled with ``mark_seen()``; entries
+# that fail stay new and come back on the next poll, and a feed with such
+# entries is fetched unconditionally next time so a 304 cannot hide them.
+# State is written by ``save()``.
+FEED_STATE_PATH = os.getenv('FEED_STATE_PATH', 'feed_state.json')
+FEED_POLL_WORKERS = int(os.getenv('FEED_POLL_WORKERS', '8'))
+# GUIDs remembered per feed; keep this above the number of items a feed lists
+FEED_SEEN_LIMIT = int(os.getenv('FEED_SEEN_LIMIT', '1000'))
+# Entries published this long before the newest one seen are treated as old even if
+# their GUID has been forgotten; feeds do backdate or reorder items a little
+FEED_REORDER_WINDOW = float(os.getenv('FEED_REORDER_WINDOW_HOURS', '24')) * 3600
+
+
+def entry_guid(entry):
+    return entry.get('id') or entry.get('link') or entry.get('title')
+
+
+def entry_published(entry):
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    return calendar.timegm(parsed) if parsed else None
+
+
+class FeedPoller:
+    def __init__(self, state_path=FEED_STATE_PATH, workers=FEED_POLL_WORKERS):
+        self.state_path = state_path
+        self.workers = workers
+        self.state = load_json(state_path, {}) or {}
+        # Per feed: validators of the last response and the returned entries not yet marked seen
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def poll(self, url):
+        """Entries of one feed not marked seen before; [] on 304 or error."""
+        host = urlparse(url).netloc
+        with self.lock:
+            feed_state = dict(self.state.get(url, {}))
+        headers = {}
+        if feed_state.get('etag'):
+            headers['If-None-Match'] = feed_state['etag']
+        if feed_state.get('modified'):
+            headers['If-Modified-Since'] = feed_state['modified']
+        try:
+            response = http_client.get(url, headers=headers)
+            if response.status_code == 304:
+                metrics.inc('feed_not_modified_total', feed=host)
+                return []
+            response.raise_for_status()
+        except Exception as e:
+            logging.error(f'Error fetching feed {url}: {e}')
+            return []
+
+        feed = feedparser.parse(response.content)
+        seen = set(feed_state.get('seen', []))
+        newest = feed_state.get('newest_published')
+        new_entries = {}
+        for entry in feed.entries:
+            guid = entry_guid(entry)
+            published = entry_published(entry)
+            if guid in seen or guid in new_entries or (published is not None and newest is not None
+                                                       and published < newest - FEED_REORDER_WINDOW):
+                continue
+            new_entries[guid] = entry
+        metrics.inc('feed_entries_total', len(feed.entries), feed=host)
+        metrics.inc('feed_new_entries_total', len(new_entries), feed=host)
+
+        with self.lock:
+            self.pending[url] = {
+                'etag': response.headers.get('ETag'),
+                'modified': response.headers.get('Last-Modified'),
+                'polled_at': time.time(),
+                'entries': new_entries,
+            }
+        logging.info(f'Feed {url}: {len(new_entries)} new of {len(feed.entries)} entries')
+        return list(new_entries.values())
+
+    def poll_many(self, urls):
+        """Poll ``urls`` concurrently; returns ``{url: new entries}``."""
+        urls = [url for url in dict.fromkeys(urls) if url]
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(urls))) as executor:
+            return dict(zip(urls, executor.map(self.poll, urls)))
+
+    def mark_seen(self, url, guids):
+        """Remember ``guids`` of ``url``'s last poll as handled, so they are not returned again."""
+        with self.lock:
+            feed_state = self.state.setdefault(url, {})
+            entries = self.pending.get(url, {}).get('entries', {})
+            seen = feed_state.get('seen', [])
+            seen_set = set(seen)
+            newest = feed_state.get('newest_published')
+            for guid in guids:
+                published = entry_published(entries.pop(guid)) if guid in entries else None
+                if published is not None and (newest is None or published > newest):
+                    newest = published
+                    feed_state['newest_guid'] = guid
+                if guid not in seen_set:
+                    seen_set.add(guid)
+                    seen.append(guid)
+            feed_state['seen'] = seen[-FEED_SEEN_LIMIT:]
+            feed_state['newest_published'] = newest
+
+    def save(self):
+        """Write the state; a feed keeps its new validators only if every returned entry was marked seen."""
+        with self.lock:
+            for url, pending in self.pending.items():
+                feed_state = self.state.setdefault(url, {})
+                feed_state['polled_at'] = pending['polled_at']
+                if pending['entries']:
+                    feed_state.pop('etag', None)
+                    feed_state.pop('modified', None)
+                else:
+                    feed_state['etag'] = pending['etag']
+                    feed_state['modified'] = pending['modified']
+            atomic_write_json(self.state_path, self.state)
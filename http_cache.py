@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import http_client
+from storage import atomic_write_json, load_json
+
+# Persistent HTTP response cache. Entries younger than their TTL are served
+# without touching the network; stale ones are revalidated with
+# If-None-Match / If-Modified-Since when the server gave us validators.
+HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', 'http_cache.json')
+
+
+class CachedResponse:
+    def __init__(self, status_code, text, headers, from_cache=False):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class ResponseCache:
+    def __init__(self, path=HTTP_CACHE_PATH):
+        self.path = path
+        self.entries = load_json(path, {}) or {}
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    @staticmethod
+    def key(method, url, params=None, data=None, json_body=None):
+        raw = json.dumps([method.upper(), url, params, data, json_body], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            atomic_write_json(self.path, self.entries)
+            self.dirty = False
+
+    def request(self, method, url, ttl, **kwargs):
+        """Send a request through the cache; only 200 responses are stored."""
+        key = self.key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+        entry = self.get(key)
+        now = time.time()
+        if entry and now - entry['fetched_at'] < ttl:
+            return CachedResponse(entry['status_code'], entry['text'], entry['headers'], from_cache=True)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry:
+            if entry['headers'].get('ETag'):
+                headers['If-None-Match'] = entry['headers']['ETag']
+            if entry['headers'].get('Last-Modified'):
+                headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        response = http_client.request(method, url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.put(key, {**entry, 'fetched_at': now})
+            return CachedResponse(entry['status_code'], entry['text'], entry['headers'], from_cache=True)
+        if response.status_code == 200:
+            validators = {name: response.headers[name] for name in ('ETag', 'Last-Modified') if name in response.headers}
+            self.put(key, {'status_code': 200, 'text': response.text, 'headers': validators, 'fetched_at': now})
+        return response
+
+    def get_url(self, url, ttl, **kwargs):
+        return self.request('GET', url, ttl, **kwargs)
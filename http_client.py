@@ -0,0 +1,153 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Shared HTTP layer: one keep-alive session, per-host token buckets and
+# 429/5xx backoff that honours Retry-After.
+DEFAULT_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '15'))
+MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '4'))
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '32'))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Blocking token bucket; ``rate`` tokens per second, up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = max(self.blocked_until - now, (tokens - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # A server-side backoff pauses every worker hitting this host
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def set_rate_limit(host, calls_per_minute, burst=None):
+    with _limiters_lock:
+        _limiters[host] = TokenBucket(calls_per_minute / 60.0, burst)
+        return _limiters[host]
+
+
+def get_rate_limiter(host):
+    with _limiters_lock:
+        return _limiters.get(host)
+
+
+def parse_retry_after(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    # Exponential backoff with jitter
+    return min(cap, base * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+
+def record_response(host, method, response, elapsed, streamed=False):
+    metrics.observe('http_request_duration_seconds', elapsed, host=host, method=method)
+    metrics.inc('http_requests_total', host=host, method=method, status=response.status_code)
+    # Streamed bodies are left unread; only a declared length is counted for them
+    size = response.headers.get('Content-Length')
+    if size is None and not streamed:
+        size = len(response.content)
+    if size is not None:
+        metrics.inc('http_response_bytes_total', int(size), host=host)
+
+
+def request(method, url, max_retries=MAX_RETRIES, backoff=1.0, **kwargs):
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    host = urlparse(url).netloc
+    limiter = get_rate_limiter(host)
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        if limiter:
+            wait_started = time.monotonic()
+            limiter.acquire()
+            metrics.observe('http_rate_limit_wait_seconds', time.monotonic() - wait_started, host=host)
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.inc('http_errors_total', host=host, error=type(e).__name__)
+            if attempt == max_retries:
+                raise
+            metrics.inc('http_retries_total', host=host, reason=type(e).__name__)
+            time.sleep(backoff_delay(attempt, backoff))
+            continue
+        record_response(host, method, response, time.monotonic() - started, kwargs.get('stream', False))
+
+        if response.status_code in RETRY_STATUSES and attempt < max_retries:
+            metrics.inc('http_retries_total', host=host, reason=response.status_code)
+            delay = parse_retry_after(response)
+            if delay is None:
+                delay = backoff_delay(attempt, backoff)
+            if limiter and response.status_code == 429:
+                limiter.pause(delay)
+            time.sleep(delay)
+            continue
+        return response
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
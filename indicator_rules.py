@@ -0,0 +1,44 @@
+# How a move in each macro indicator is read for the crypto market. Kept
+# free of I/O so the live monitor and the replay harness share one rule.
+INFLUENCE = {
+    'Unemployment Rate': {
+        'increase': "行情利空，对币市看空 😔",
+        'decrease': "行情利好，对币市看多 🙂"
+    },
+    'Real GDP (FRED)': {
+        'increase': "对经济有利，风险较大，对币市看多 🙂",
+        'decrease': "对经济不利，风险较大，对币市看空 😔"
+    },
+    'Consumer Price Index (CPI)': {
+        'increase': "对抗通胀有利，对币市看多 🙂",
+        'decrease': "通胀减少无明显影响 😐"
+    },
+    'Fed Interest Rate Policy': {
+        'increase': "利率上升，对币市看空 😔",
+        'decrease': "利率下降，对币市看多 🙂"
+    },
+    'Producer Price Index (PPI)': {
+        'increase': "对抗通胀有利，对币市看多 🙂",
+        'decrease': "生产成本下降无明显影响 😐"
+    },
+    'Non-Farm Payroll Report': {
+        'increase': "就业增加，对币市看多 🙂",
+        'decrease': "就业减少，对币市看空 😔"
+    },
+    'Retail Sales Data': {
+        'increase': "消费增加，对币市看多 🙂",
+        'decrease': "消费减少，对币市看空 😔"
+    },
+    'Fear and Greed Index': {
+        'increase': "市场恐惧减弱，对币市看多 🙂",
+        'decrease': "市场恐惧增强，对币市看空 😔"
+    }
+}
+
+
+# Message for an indicator whose value changed; a first observation counts as a decrease, as before
+def describe_change(key, prev_value, current_value):
+    direction = "increase" if prev_value is not None and current_value > prev_value else "decrease"
+    impact = INFLUENCE[key][direction]
+    prev_value_display = prev_value if prev_value is not None else '无记录的'
+    return f"{key} 更新: 由 {prev_value_display} 变为 {current_value} ({'📈 增加' if direction == 'increase' else '📉 减少'}, {impact})"
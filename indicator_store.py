@@ -0,0 +1,81 @@
+import os
+from datetime import datetime, timezone
+
+from storage import connect_sqlite
+
+# Append-only history of every indicator value we have observed. Rows are
+# never updated; the latest value of a series is simply its newest row.
+INDICATOR_DB_PATH = os.getenv('INDICATOR_DB_PATH', 'indicators.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    series TEXT NOT NULL,
+    value REAL NOT NULL,
+    date TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_observations_series ON observations (series, id);
+CREATE INDEX IF NOT EXISTS idx_observations_recorded ON observations (series, recorded_at);
+"""
+
+
+class IndicatorStore:
+    def __init__(self, path=INDICATOR_DB_PATH):
+        self.conn = connect_sqlite(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def is_empty(self):
+        return self.conn.execute('SELECT 1 FROM observations LIMIT 1').fetchone() is None
+
+    def append(self, observations, recorded_at=None):
+        """Append ``{series: (value, date)}`` in a single transaction."""
+        recorded_at = (recorded_at or datetime.now(timezone.utc)).isoformat()
+        rows = [(series, value, date, recorded_at) for series, (value, date) in observations.items() if value is not None]
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO observations (series, value, date, recorded_at) VALUES (?, ?, ?, ?)', rows
+            )
+        return len(rows)
+
+    def latest(self):
+        """Return ``{series: {'value', 'date', 'recorded_at'}}`` for the newest row of each series."""
+        cursor = self.conn.execute(
+            'SELECT series, value, date, recorded_at FROM observations '
+            'WHERE id IN (SELECT MAX(id) FROM observations GROUP BY series)'
+        )
+        return {
+            series: {'value': value, 'date': date, 'recorded_at': recorded_at}
+            for series, value, date, recorded_at in cursor
+        }
+
+    def history(self, series, start=None, end=None):
+        """Return ``[(recorded_at, value, date), ...]`` for ``series``, oldest first.
+
+        ``start``/``end`` are datetimes bounding ``recorded_at`` (end exclusive).
+        """
+        query = 'SELECT recorded_at, value, date FROM observations WHERE series = ?'
+        params = [series]
+        if start is not None:
+            query += ' AND recorded_at >= ?'
+            params.append(start.isoformat())
+        if end is not None:
+            query += ' AND recorded_at < ?'
+            params.append(end.isoformat())
+        return self.conn.execute(query + ' ORDER BY id', params).fetchall()
+
+    def import_snapshot(self, snapshot, recorded_at=None):
+        # Seed an empty store from the old news_economic.json layout
+        return self.append({
+            series: (entry.get('value'), entry.get('date'))
+            for series, entry in snapshot.items() if isinstance(entry, dict)
+        }, recorded_at)
@@ -0,0 +1,64 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """Find many keywords in one linear pass using a single compiled regex.
+
+    Terms only match as whole words (no ASCII letter or digit on either side),
+    so "sol" does not hit "resolution" and "eth" does not hit "whether". A
+    plural "s"/"es" suffix is allowed: "sanctions" and "taxes" count as
+    "sanction" and "tax".
+    Spaces inside a term match any run of whitespace. Overlapping terms follow
+    leftmost-longest order: "interest rate hike" is counted once, not also as
+    "rate hike".
+    """
+
+    def __init__(self, terms, ignore_case=True):
+        self.ignore_case = ignore_case
+        self.terms = {}
+        for term in terms:
+            if term and self._normalize(term) not in self.terms:
+                self.terms[self._normalize(term)] = term
+        alternation = '|'.join(
+            r'\s+'.join(re.escape(word) for word in term.split())
+            for term in sorted(self.terms.values(), key=len, reverse=True)
+        )
+        flags = re.IGNORECASE if ignore_case else 0
+        self.pattern = re.compile(rf'(?<![A-Za-z0-9])(?P<term>{alternation})(?:e?s)?(?![A-Za-z0-9])',
+                                  flags) if alternation else None
+
+    def _normalize(self, term):
+        term = ' '.join(term.split())
+        return term.lower() if self.ignore_case else term
+
+    def counts(self, *texts):
+        """Return a Counter of ``{term: occurrences}`` over all ``texts``."""
+        counts = Counter()
+        if self.pattern is None:
+            return counts
+        for text in texts:
+            for match in self.pattern.finditer(text or ''):
+                counts[self.terms[self._normalize(match.group('term'))]] += 1
+        return counts
+
+    def search(self, *texts):
+        """Return the first matching term, or None."""
+        if self.pattern is None:
+            return None
+        for text in texts:
+            match = self.pattern.search(text or '')
+            if match:
+                return self.terms[self._normalize(match.group('term'))]
+        return None
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(terms, ignore_case):
+    return KeywordMatcher(terms, ignore_case)
+
+
+def matcher_for(terms, ignore_case=True):
+    # Compile once per distinct keyword list
+    return _cached_matcher(tuple(terms), ignore_case)
@@ -1,28 +1,42 @@
 import os
-import requests
-import json
+import hashlib
 import logging
 import schedule
 import time
 from datetime import datetime
 from dotenv import load_dotenv
 import openai
+import notifier
+import chain_scanner
+import metrics
+from link_store import LinkStore
+from storage import atomic_write_json, load_json
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', handlers=[
-    logging.FileHandler("news_transfers.txt", mode='w'),  # Overwrite news_transfers.txt
+    logging.FileHandler("large_transfer_log.txt", mode='a'),  # news_transfers.txt holds the data, not the log
     logging.StreamHandler()
 ])
 
 # Set API keys and monitoring addresses
-COINGECKO_API_URL = os.getenv('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3')
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 OPENAI_API_SECRET_KEY = os.getenv('OPENAI_API_SECRET_KEY')
 OPENAI_BASE_API_URL = os.getenv('OPENAI_BASE_API_URL')
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+TRANSFERS_DATA_PATH = 'news_transfers.txt'
+SUMMARY_CACHE_PATH = os.getenv('TRANSFER_SUMMARY_CACHE_PATH', 'transfer_summaries.json')
+SUMMARY_CACHE_SIZE = int(os.getenv('TRANSFER_SUMMARY_CACHE_SIZE', '200'))
+TRANSFERS_PER_PROMPT = int(os.getenv('TRANSFERS_PER_PROMPT', '50'))
+# Unreported transfers are retried on later runs, but not forever: stale ones are dropped and
+# the backlog is capped (largest kept) so a GPT outage cannot grow the prompt without limit
+PENDING_TRANSFER_MAX_AGE = float(os.getenv('PENDING_TRANSFER_MAX_AGE_HOURS', '24')) * 3600
+MAX_PENDING_TRANSFERS = int(os.getenv('MAX_PENDING_TRANSFERS', '200'))
+SUMMARY_PROMPT = ("Summarize the following large cryptocurrency transfers for a Telegram alert. "
+                  "Highlight the biggest amounts and any notable patterns.\n\n")
 ETH_THRESHOLD_STRING = os.getenv('ETH_THRESHOLD', '100')  # ETH large transaction threshold (in ETH)
 BTC_THRESHOLD_STRING = os.getenv('BTC_THRESHOLD', '10')   # BTC large transaction threshold (in BTC)
 
@@ -39,100 +53,141 @@ except ValueError:
     logging.error(f"Invalid BTC_THRESHOLD value: {BTC_THRESHOLD_STRING}. Using default value 10.")
     BTC_THRESHOLD = 10.0
 
-# Set OpenAI key and API endpoint
-openai.api_key = OPENAI_API_SECRET_KEY
-if OPENAI_BASE_API_URL:
-    openai.api_base = OPENAI_BASE_API_URL
+_openai_client = None
 
-logging.debug(f"Using OpenAI API base URL: {openai.api_base}")
+# Built on first use, so importing the module works without an API key
+def get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = openai.OpenAI(api_key=OPENAI_API_SECRET_KEY, base_url=OPENAI_BASE_API_URL or None)
+        logging.debug(f"Using OpenAI API base URL: {_openai_client.base_url}")
+    return _openai_client
 
+def format_transfer(transfer):
+    unit = 'ETH' if transfer['chain'] == 'ethereum' else 'BTC'
+    return (f"Large {transfer['chain'].upper()} Transaction: Time: {datetime.fromtimestamp(transfer['timestamp'])}, "
+            f"Value: {transfer['value']:.4f} {unit}, Block: {transfer['block']}, Hash: {transfer['hash']}, "
+            f"From: {transfer['from']}, To: {transfer['to']}")
+
+def transfer_key(transfer):
+    return f"{transfer['chain']}:{transfer['hash']}"
+
+# Scan blocks mined since the last run for value transfers of at least `threshold` coins.
+# Returns (transfers, height); the height is saved by the caller once the transfers are stored.
+# A failing chain is logged and skipped, so it cannot cost the other chain its results.
 def check_large_transfers(coin_id, threshold):
-    url = f"{COINGECKO_API_URL}/coins/{coin_id}/market_chart"
-    params = {
-        'vs_currency': 'usd',
-        'days': '1'
-    }
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        transactions = response.json().get('prices', [])
-        large_transactions = []
-        for tx in transactions:
-            value = tx[1]  # Assuming value is in the second position
-            if value >= threshold:
-                tx_info = f'Large {coin_id.upper()} Transaction: Time: {datetime.fromtimestamp(tx[0]/1000)}, Value: {value} USD'
-                logging.info(tx_info)
-                large_transactions.append(tx_info)
-        return large_transactions
-    except requests.RequestException as e:
-        logging.error(f"Error fetching {coin_id} transactions: {e}")
-        return []
+        with metrics.stage('transfers.scan', chain=coin_id):
+            transfers, height = chain_scanner.scan_pending_blocks(coin_id, threshold)
+    except Exception as e:
+        logging.error(f"Error scanning {coin_id} blocks: {e!r}")
+        return [], None
+    metrics.items('transfers.scan', len(transfers))
+    for transfer in transfers:
+        logging.info(format_transfer(transfer))
+    return transfers, height
+
+def save_scanned_heights(heights):
+    for chain, height in heights.items():
+        if height is not None:
+            chain_scanner.save_height(chain, height)
 
 def send_message_to_telegram(message):
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "disable_notification": True
-    }
-    try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        return True
-    except requests.RequestException as e:
-        logging.error(f"Failed to send message to Telegram: {e}")
-        return False
-
-def process_with_gpt(real_url):
+    # Delivery happens on the notifier's background queue
+    return notifier.notify(message, token=TELEGRAM_BOT_TOKEN, chat_id=TELEGRAM_CHAT_ID, disable_notification=True)
+
+def process_with_gpt(content):
     try:
-        logging.debug(f"Processing URL with GPT: {real_url}")
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": real_url}]
+        logging.debug(f"Summarizing {len(content)} characters with GPT")
+        response = get_openai_client().chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[{"role": "user", "content": SUMMARY_PROMPT + content}]
         )
-        return response.choices[0].message['content']
+        return response.choices[0].message.content
     except openai.OpenAIError as e:
         logging.error(f"Error processing with GPT: {e}")
         return None
 
-def check_and_log_data():
-    eth_transactions = check_large_transfers('ethereum', ETH_THRESHOLD)
-    btc_transactions = check_large_transfers('bitcoin', BTC_THRESHOLD)
-
-    if not eth_transactions and not btc_transactions:
-        logging.info("No large transactions, skipping further processing.")
-        return
+# Summaries keyed by a hash of the exact batch text; a batch seen before costs no tokens
+def summarize_transfers(lines, cache):
+    content = "\n".join(lines)
+    key = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    if key in cache:
+        logging.info("Reusing cached summary for an unchanged transfer batch.")
+        metrics.inc('llm_summary_cache_hits_total')
+        return cache[key]
+    with metrics.stage('transfers.summarize'):
+        summary = process_with_gpt(content)
+    if summary:
+        cache[key] = summary
+        # Dicts keep insertion order, so the oldest summaries are dropped first
+        for old_key in list(cache)[:-SUMMARY_CACHE_SIZE]:
+            del cache[old_key]
+    return summary
+
+# Largest first; transfers past PENDING_TRANSFER_MAX_AGE or MAX_PENDING_TRANSFERS are dropped
+def prune_pending(transfers, now=None):
+    now = time.time() if now is None else now
+    fresh = [t for t in transfers if now - t['timestamp'] <= PENDING_TRANSFER_MAX_AGE]
+    kept = sorted(fresh, key=lambda t: t['value'], reverse=True)[:MAX_PENDING_TRANSFERS]
+    dropped = len(transfers) - len(kept)
+    if dropped:
+        logging.warning(f"Dropping {dropped} unreported transfers that are too old or over the backlog limit.")
+        metrics.inc('transfers_dropped_total', dropped)
+    return kept
 
-    new_data_json = json.dumps({
-        'ethereum': eth_transactions,
-        'bitcoin': btc_transactions
-    }, indent=2)
+def check_and_log_data():
+    with metrics.stage('transfers'):
+        _check_and_log_data()
 
+def _check_and_log_data():
+    seen = LinkStore('transfers')
     try:
-        existing_data_json = ""
-        if os.path.exists("news_transfers.txt"):
-            with open("news_transfers.txt", 'r') as file:
-                existing_data_json = file.read()
-
-        if new_data_json == existing_data_json:
-            logging.info("No changes in transaction data, skipping further processing.")
-        else:
-            with open("news_transfers.txt", 'w') as file:
-                file.write(new_data_json)
-
-            news_file_url = 'https://raw.githubusercontent.com/sdlkhfksl/crypto-data-analysis/main/news_transfers.txt'
-            gpt_content = process_with_gpt(news_file_url)
-            if gpt_content:
-                if send_message_to_telegram(gpt_content):
-                    logging.info("Message sent to Telegram successfully.")
-                with open("processed.txt", 'a') as file:
-                    file.write(f"\nTimestamp: {datetime.now()}\n")
-                    file.write(gpt_content)
-                    file.write("\n" + "-"*80 + "\n")
-            else:
+        # Transfers from the previous batch that were never reported are retried
+        previous = load_json(TRANSFERS_DATA_PATH, [])
+        candidates = previous if isinstance(previous, list) else []
+        heights = {}
+        for chain, threshold in (('ethereum', ETH_THRESHOLD), ('bitcoin', BTC_THRESHOLD)):
+            transfers, heights[chain] = check_large_transfers(chain, threshold)
+            candidates = candidates + transfers
+        new_transfers = list({transfer_key(t): t for t in candidates if transfer_key(t) not in seen}.values())
+        new_transfers = prune_pending(new_transfers)
+
+        if not new_transfers:
+            save_scanned_heights(heights)
+            logging.info("No new large transactions since the last run, skipping further processing.")
+            return
+
+        # Scanned heights are only saved once their transfers are on disk
+        atomic_write_json(TRANSFERS_DATA_PATH, new_transfers, indent=2)
+        save_scanned_heights(heights)
+        logging.info(f"{len(new_transfers)} new large transactions since the last run.")
+
+        cache = load_json(SUMMARY_CACHE_PATH, {})
+        reported = 0
+        # Many transfers go into one prompt; only very large batches are split
+        for i in range(0, len(new_transfers), TRANSFERS_PER_PROMPT):
+            batch = new_transfers[i:i + TRANSFERS_PER_PROMPT]
+            gpt_content = summarize_transfers([format_transfer(t) for t in batch], cache)
+            if not gpt_content:
                 logging.error("Failed to process data with GPT.")
+                break
+            if send_message_to_telegram(gpt_content):
+                logging.info("Message queued for Telegram.")
+            with open("processed.txt", 'a') as file:
+                file.write(f"\nTimestamp: {datetime.now()}\n")
+                file.write(gpt_content)
+                file.write("\n" + "-"*80 + "\n")
+            reported += len(batch)
+        atomic_write_json(SUMMARY_CACHE_PATH, cache, indent=2)
+
+        # Only reported transfers are marked seen; the rest stay in news_transfers.txt for the next run
+        seen.add_many(transfer_key(t) for t in new_transfers[:reported])
+        seen.commit()
     except Exception as e:
         logging.error(f"Error during check and log data process: {e}")
+    finally:
+        seen.close()
 
 if __name__ == "__main__":
     check_and_log_data()
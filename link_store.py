@@ -0,0 +1,97 @@
+import logging
+import os
+import time
+
+from storage import connect_sqlite
+
+# Dedup store for URLs (and other identity keys). Membership is a primary-key
+# lookup, so it stays cheap however large the history grows. Different kinds
+# of keys live side by side under their own namespace.
+LINK_DB_PATH = os.getenv('LINK_DB_PATH', 'links.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    namespace TEXT NOT NULL,
+    url TEXT NOT NULL,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (namespace, url)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_links_added ON links (namespace, added_at);
+"""
+
+
+class LinkStore:
+    def __init__(self, namespace, path=LINK_DB_PATH):
+        self.namespace = namespace
+        self.conn = connect_sqlite(path)
+        self.conn.executescript(SCHEMA)
+        self.pending = {}
+
+    def close(self):
+        self.conn.close()
+
+    def __contains__(self, url):
+        if url in self.pending:
+            return True
+        row = self.conn.execute(
+            'SELECT 1 FROM links WHERE namespace = ? AND url = ?', (self.namespace, url)
+        ).fetchone()
+        return row is not None
+
+    def is_empty(self):
+        return self.conn.execute('SELECT 1 FROM links WHERE namespace = ? LIMIT 1', (self.namespace,)).fetchone() is None
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM links WHERE namespace = ?', (self.namespace,)).fetchone()[0]
+
+    def add(self, url):
+        # Buffered until commit() so a run's inserts land in one transaction
+        self.pending.setdefault(url, time.time())
+
+    def add_many(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def commit(self):
+        if not self.pending:
+            return 0
+        rows = [(self.namespace, url, added_at) for url, added_at in self.pending.items()]
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO links (namespace, url, added_at) VALUES (?, ?, ?)', rows)
+        self.pending = {}
+        return len(rows)
+
+    def recent(self, limit):
+        """Return the ``limit`` most recently added keys, oldest first."""
+        rows = self.conn.execute(
+            'SELECT url FROM links WHERE namespace = ? ORDER BY added_at DESC LIMIT ?', (self.namespace, limit)
+        ).fetchall()
+        return [url for (url,) in reversed(rows)]
+
+    def prune(self, max_age):
+        """Drop keys older than ``max_age`` seconds; returns how many were removed."""
+        with self.conn:
+            cursor = self.conn.execute(
+                'DELETE FROM links WHERE namespace = ? AND added_at < ?', (self.namespace, time.time() - max_age)
+            )
+        return cursor.rowcount
+
+    def trim(self, keep):
+        # Keep only the newest ``keep`` keys
+        with self.conn:
+            cursor = self.conn.execute(
+                'DELETE FROM links WHERE namespace = ? AND url NOT IN '
+                '(SELECT url FROM links WHERE namespace = ? ORDER BY added_at DESC LIMIT ?)',
+                (self.namespace, self.namespace, keep)
+            )
+        return cursor.rowcount
+
+    def import_lines(self, path):
+        # One-off migration from the old one-link-per-line text files
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as file:
+            self.add_many(line.strip() for line in file if line.strip())
+        count = self.commit()
+        logging.info(f"Imported {count} entries from {path} into the {self.namespace} link store")
+        return count
@@ -1,106 +1,114 @@
 import os
-import ccxt
-import requests
+from candle_store import CandleStore
+from market_data import get_provider
+import http_client
+import metrics
+import notifier
+import screener
 
-# 从环境变量中获取 Telegram Bot 和新闻文本的URL
+# 从环境变量中获取 Telegram Bot 配置和新闻文本的URL
 bot_token = os.environ.get('TELEGRAM_BOT_TOKEN')
 chat_id = os.environ.get('TELEGRAM_CHAT_ID')
-telegram_api_url = f'https://api.telegram.org/bot{bot_token}/sendMessage'
 news_url = "https://raw.githubusercontent.com/sdlkhfksl/fetch_news/main/articles_content.txt"
+# 新闻中至少出现的次数（不含）
+MIN_MENTIONS = int(os.environ.get('MIN_MENTIONS', '20'))
+# 筛选规则，逗号分隔的 "特征 比较符 阈值"，可用特征见 screener.TICKER_FEATURES / CANDLE_FEATURES；
+# 默认：当日上涨、新闻提及足够多、24h 成交量超过近几日日均的两倍
+SCREENER_RULES = os.environ.get('SCREENER_RULES')
 
-# 初始化交易所（使用Kraken）
-exchange = ccxt.kraken()
+def default_rules(min_mentions=MIN_MENTIONS):
+    if SCREENER_RULES:
+        return screener.parse_rules(SCREENER_RULES)
+    return screener.parse_rules(f"change_pct>0,mentions>{min_mentions},relative_volume>2")
 
-# 获取市场数据
-markets = exchange.load_markets()
-symbols = [symbol for symbol in markets if '/USD' in symbol and markets[symbol].get('active', False)]
+# 初始化交易所（使用Kraken），首次调用时才创建，市场信息优先从本地缓存加载；
+# 行情请求经由 market_data 统一限速、合并与短时缓存
+def get_exchange_provider():
+    return get_provider('kraken')
 
-# 获取涨幅榜前五位的标的
-def top_gainers(symbols, exchange, limit=5):
-    try:
-        tickers = exchange.fetch_tickers(symbols)
-        sorted_tickers = sorted(tickers.values(), key=lambda x: x.get('percentage', 0), reverse=True)
-        top_symbols = [ticker['symbol'] for ticker in sorted_tickers[:limit] if ticker.get('symbol')]
-        return top_symbols
-    except Exception as e:
-        print(f"Error fetching tickers: {e}")
-        return []
+# 筛选活跃的 USD 交易对
+def get_usd_symbols(markets):
+    return [symbol for symbol in markets if '/USD' in symbol and markets[symbol].get('active', False)]
 
-# 获取前一天的成交量和价格
-def fetch_previous_day_data(symbol, exchange):
-    try:
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe='1d', limit=2)
-        previous_day = ohlcv[-2]
-        previous_volume = previous_day[5]  # 第6列是成交量
-        previous_close = previous_day[4]  # 第5列是收盘价
-        return previous_volume, previous_close
-    except Exception as e:
-        print(f"Error fetching previous day data for {symbol}: {e}")
-        return None, None
+# 单次运行内的行情缓存：复用 fetch_tickers 的结果，每个标的的日K只请求一次；
+# 给了 candle_store 时日K从本地K线库读取，只向交易所补拉新收盘和缺失的K线
+class MarketData:
+    def __init__(self, provider, candle_store=None):
+        self.provider = provider
+        self.candle_store = candle_store
+        self.tickers = {}
+        self.ohlcv = {}
+
+    def load_tickers(self, symbols):
+        self.tickers.update(self.provider.tickers(symbols))
+        return self.tickers
+
+    # 并发拉取日K，限速由 market_data 按交易所主机统一控制
+    def load_ohlcv(self, symbols, timeframe='1d', limit=3):
+        missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.ohlcv]
+        if not missing:
+            return
+        if self.candle_store is not None:
+            errors = self.candle_store.update(self.provider, missing, timeframe)
+            for symbol, error in errors.items():
+                print(f"Error fetching OHLCV for {symbol}: {error}")  # 沿用库中已有的K线
+            for symbol in missing:
+                self.ohlcv[symbol] = self.candle_store.recent(symbol, timeframe, limit)
+            return
+        results = self.provider.ohlcv_many(missing, timeframe, limit)
+        for symbol, result in results.items():
+            if isinstance(result, Exception):
+                print(f"Error fetching OHLCV for {symbol}: {result}")
+                result = []  # 本轮不再重试失败的标的
+            self.ohlcv[symbol] = result
+
+    def ticker(self, symbol):
+        if symbol not in self.tickers:
+            self.tickers[symbol] = self.provider.ticker(symbol)
+        return self.tickers[symbol]
 
-# 检查标的是否符合条件
-def check_conditions(symbol, exchange, news_content):
+    def daily_ohlcv(self, symbol):
+        if symbol not in self.ohlcv:
+            self.load_ohlcv([symbol])
+        return self.ohlcv.get(symbol, [])
+
+# 同时满足全部筛选规则的标的（实盘与回放共用），按 24h 涨幅从高到低
+def select_symbols(symbols, market_data, news_content, rules=None, min_mentions=MIN_MENTIONS):
+    if rules is None:
+        rules = default_rules(min_mentions)
     try:
-        ticker = exchange.fetch_ticker(symbol)
-        
-        # 获取前两天的成交量平均值
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe='1d', limit=3)
-        volume_sum = sum([data[5] for data in ohlcv[:-1]])  # 排除当日和前一日的成交量
-        average_volume = volume_sum / 2  # 前两天的平均每天成交量
-        
-        # 计算相对成交量
-        today_volume = ticker.get('quoteVolume', 0)
-        relative_volume = today_volume / average_volume if average_volume else 0
-        
-        # 获取昨天的流通量
-        circulating_supply = ticker['info'].get('circulating_supply', None)
-        if circulating_supply is None:
-            return False
-        
-        previous_day_circulating_supply, _ = fetch_previous_day_data(symbol, exchange)
-        if previous_day_circulating_supply is None:
-            return False
-        
-        # 计算流通量比
-        circulating_supply_ratio = circulating_supply / previous_day_circulating_supply if previous_day_circulating_supply else 0
-        
-        # 检查条件
-        if relative_volume / circulating_supply_ratio > 2:
-            return True
-        
-        return False
+        selected = screener.screen(symbols, market_data, news_content, rules)
     except Exception as e:
-        print(f"Error checking conditions for {symbol}: {e}")
-        return False
-
-# 获取币种在新闻文本中出现的次数
-def get_coin_occurrences(news_content, symbols):
-    coin_occurrences = {}
-    for symbol in symbols:
-        # 将符号转换为币种名称（例如，'BTC/USD' 转换为 'BTC'）
-        coin_name = symbol.split('/')[0]
-        occurrences = news_content.count(coin_name)
-        coin_occurrences[symbol] = occurrences
-    return coin_occurrences
-
-# 请求新闻文本
-response = requests.get(news_url)
-news_content = response.text
-
-# 获取涨幅榜前五位的标的
-top_symbols = top_gainers(symbols, exchange)
-
-# 获取币种在新闻文本中出现的次数
-coin_occurrences = get_coin_occurrences(news_content, top_symbols)
-
-# 符合条件的标的
-selected_symbols = [symbol for symbol in top_symbols if check_conditions(symbol, exchange, news_content) and coin_occurrences.get(symbol, 0) > 20]
-
-# 发送满足条件的结果到 Telegram Bot
-if selected_symbols:
+        print(f"Error screening symbols: {e}")
+        return []
+    return list(selected.index)
+
+def selection_alert(selected_symbols):
     message = "满足条件的标的：\n" + "\n".join(selected_symbols)
-    payload = {
-        'chat_id': chat_id,
-        'text': message
-    }
-    requests.post(telegram_api_url, json=payload)
+    return message, "market_conditions:" + ",".join(sorted(selected_symbols))
+
+def main():
+    with metrics.stage('market.markets'):
+        provider = get_exchange_provider()
+        symbols = get_usd_symbols(provider.markets())
+
+    # 请求新闻文本
+    with metrics.stage('market.news'):
+        response = http_client.get(news_url)
+        response.raise_for_status()
+        news_content = response.text
+
+    # 对全部 USD 交易对按列计算特征并筛选；只有通过行情规则的标的才取日K
+    market_data = MarketData(provider, CandleStore(provider.exchange_id))
+    with metrics.stage('market.screen'):
+        selected_symbols = select_symbols(symbols, market_data, news_content)
+    metrics.items('market.tickers', len(market_data.tickers))
+    metrics.items('market.ohlcv', len(market_data.ohlcv))
+
+    # 发送满足条件的结果到 Telegram Bot
+    if selected_symbols:
+        message, key = selection_alert(selected_symbols)
+        notifier.notify(message, key=key, token=bot_token, chat_id=chat_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+import ccxt.async_support as ccxt_async
+
+import exchange_cache
+import http_client
+from storage import load_json
+
+# One access layer for market data. Every backend shares the process-wide
+# connection pool and per-host rate budget from http_client, coalesces
+# identical in-flight requests and keeps responses for a short TTL, so jobs
+# running in the same window reuse each other's results instead of refetching.
+COINGECKO_API_URL = os.getenv('COINGECKO_API_URL', 'https://api.coingecko.com/api/v3')
+# CoinGecko's free tier allows roughly 30 calls a minute; paid plans can raise it.
+# At 100 ids per call that is about 3,000 prices a minute: a sweep of all ~15,000
+# coins takes about 5 minutes, so a 60 s tick only holds once the coin universe's
+# quiet tiers keep the coins due per tick below that (monitor.py warns on overruns).
+COINGECKO_CALLS_PER_MINUTE = float(os.getenv('COINGECKO_CALLS_PER_MINUTE', '30'))
+COINGECKO_BURST = int(os.getenv('COINGECKO_BURST', '8'))
+MARKET_DATA_TTL = float(os.getenv('MARKET_DATA_TTL', '30'))
+COIN_LIST_TTL = float(os.getenv('COIN_LIST_TTL', '3600'))
+# Path to a recorded-responses JSON file; when set every provider serves from it
+MARKET_DATA_FIXTURE = os.getenv('MARKET_DATA_FIXTURE')
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers with the same key share its outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class TTLCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, key, value, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + ttl, value)
+            # Sweep expired entries once the cache grows, so it never holds more than a window's worth
+            if len(self._entries) > 1024:
+                self._entries = {k: e for k, e in self._entries.items() if e[0] >= now}
+
+
+class Provider:
+    """Base class: ``cached`` wraps a fetch in the TTL cache and single-flight group.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl=MARKET_DATA_TTL):
+        self.ttl = ttl
+        self.cache = TTLCache()
+        self.flights = SingleFlight()
+
+    def cached(self, key, fetch, ttl=None):
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+
+        def load():
+            # Another caller may have filled the cache while this one waited to lead
+            value = self.cache.get(key)
+            if value is None:
+                value = fetch()
+                self.cache.put(key, value, self.ttl if ttl is None else ttl)
+            return value
+
+        return self.flights.do(key, load)
+
+
+class CoinGeckoProvider(Provider):
+    def __init__(self, base_url=COINGECKO_API_URL, calls_per_minute=COINGECKO_CALLS_PER_MINUTE,
+                 burst=COINGECKO_BURST, ttl=MARKET_DATA_TTL):
+        super().__init__(ttl)
+        self.base_url = base_url
+        http_client.set_rate_limit(urlparse(base_url).netloc, calls_per_minute, burst=burst)
+
+    def _get_json(self, path, params=None):
+        response = http_client.get(f"{self.base_url}{path}", params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def list_coins(self):
+        return self.cached(('coins',), lambda: self._get_json('/coins/list'), ttl=COIN_LIST_TTL)
+
+    def simple_prices(self, coin_ids, vs_currency='usd', include_24hr_vol=False):
+        params = {'ids': ",".join(coin_ids), 'vs_currencies': vs_currency}
+        if include_24hr_vol:
+            params['include_24hr_vol'] = 'true'
+        return self.cached(('prices', tuple(coin_ids), vs_currency, include_24hr_vol),
+                           lambda: self._get_json('/simple/price', params))
+
+
+def exchange_host(exchange):
+    api = exchange.urls.get('api')
+    if isinstance(api, dict):
+        api = next((url for url in api.values() if isinstance(url, str)), None)
+    return urlparse(api).netloc if api else exchange.id
+
+
+class CcxtProvider(Provider):
+    """Exchange data through ccxt, throttled by the shared http_client budget for the exchange host.
+
+    ccxt's per-instance throttle is switched off because the sync and async
+    instances would otherwise each keep their own separate budget. Sync calls
+    go over http_client's pooled session; the async OHLCV fetch uses ccxt's
+    own aiohttp session, which requests' pool cannot serve.
+    """
+
+    def __init__(self, exchange_id='kraken', ttl=MARKET_DATA_TTL):
+        super().__init__(ttl)
+        self.exchange_id = exchange_id
+        self.exchange = exchange_cache.get_exchange(exchange_id)
+        self.exchange.enableRateLimit = False
+        # The exchange is shared and lives for the process, so it never closes the shared session early
+        self.exchange.session = http_client.get_session()
+        self.host = exchange_host(self.exchange)
+        if http_client.get_rate_limiter(self.host) is None:
+            http_client.set_rate_limit(self.host, 60000 / self.exchange.rateLimit, burst=2)
+        self.limiter = http_client.get_rate_limiter(self.host)
+
+    def markets(self):
+        return self.exchange.markets
+
+    def _call(self, method, *args, **kwargs):
+        self.limiter.acquire()
+        return getattr(self.exchange, method)(*args, **kwargs)
+
+    def tickers(self, symbols):
+        return self.cached(('tickers', tuple(symbols)), lambda: self._call('fetch_tickers', symbols))
+
+    def ticker(self, symbol):
+        return self.cached(('ticker', symbol), lambda: self._call('fetch_ticker', symbol))
+
+    def ohlcv(self, symbol, timeframe='1d', limit=3, since=None):
+        return self.cached(('ohlcv', symbol, timeframe, limit, since),
+                           lambda: self._call('fetch_ohlcv', symbol, timeframe=timeframe, since=since, limit=limit))
+
+    def ohlcv_many(self, symbols, timeframe='1d', limit=3, since=None):
+        """Candles for many symbols, fetched concurrently; failed symbols map to the exception."""
+        results = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            candles = self.cache.get(('ohlcv', symbol, timeframe, limit, since))
+            if candles is None:
+                missing.append(symbol)
+            else:
+                results[symbol] = candles
+        if missing:
+            fetched = self.flights.do(('ohlcv_many', tuple(missing), timeframe, limit, since),
+                                      lambda: asyncio.run(self._fetch_ohlcv_async(missing, timeframe, limit, since)))
+            for symbol, candles in fetched.items():
+                if not isinstance(candles, Exception):
+                    self.cache.put(('ohlcv', symbol, timeframe, limit, since), candles, self.ttl)
+                results[symbol] = candles
+        return results
+
+    async def _fetch_ohlcv_async(self, symbols, timeframe, limit, since=None):
+        async_exchange = getattr(ccxt_async, self.exchange_id)({'enableRateLimit': False})
+        async_exchange.set_markets(self.exchange.markets, self.exchange.currencies)  # reuse loaded markets
+
+        async def fetch(symbol):
+            await asyncio.to_thread(self.limiter.acquire)
+            return await async_exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+        try:
+            results = await asyncio.gather(*(fetch(symbol) for symbol in symbols), return_exceptions=True)
+        finally:
+            await async_exchange.close()
+        return dict(zip(symbols, results))
+
+
+class ReplayProvider(Provider):
+    """Serves recorded responses from a JSON fixture; stands in for every backend offline.
+
+    Fixture keys: ``coins``, ``prices``, ``markets``, ``currencies``,
+    ``tickers`` and ``ohlcv`` (symbol -> candles). Missing keys read as empty.
+    ``data`` takes the same structure in memory instead of a file.
+    """
+
+    exchange_id = 'replay'
+
+    def __init__(self, path=None, data=None):
+        super().__init__(ttl=0)
+        self.path = path
+        self.data = data if data is not None else load_json(path, {})
+
+    def list_coins(self):
+        return self.data.get('coins', [])
+
+    def simple_prices(self, coin_ids, vs_currency='usd', include_24hr_vol=False):
+        prices = self.data.get('prices', {})
+        return {coin_id: prices[coin_id] for coin_id in coin_ids if coin_id in prices}
+
+    def markets(self):
+        return self.data.get('markets', {})
+
+    def tickers(self, symbols):
+        tickers = self.data.get('tickers', {})
+        return {symbol: tickers[symbol] for symbol in symbols if symbol in tickers}
+
+    def ticker(self, symbol):
+        return self.data.get('tickers', {})[symbol]
+
+    def ohlcv(self, symbol, timeframe='1d', limit=3, since=None):
+        candles = self.data.get('ohlcv', {}).get(symbol, [])
+        if since is not None:
+            return [candle for candle in candles if candle[0] >= since][:limit]
+        return candles[-limit:]
+
+    def ohlcv_many(self, symbols, timeframe='1d', limit=3, since=None):
+        return {symbol: self.ohlcv(symbol, timeframe, limit, since) for symbol in dict.fromkeys(symbols)}
+
+
+def get_provider(name='coingecko'):
+    """Shared provider for ``name`` ('coingecko' or a ccxt exchange id), or the fixture replay when configured."""
+    if MARKET_DATA_FIXTURE:
+        name = 'replay'
+    with _providers_lock:
+        provider = _providers.get(name)
+        if provider is None:
+            if name == 'replay':
+                provider = ReplayProvider(MARKET_DATA_FIXTURE)
+            elif name == 'coingecko':
+                provider = CoinGeckoProvider()
+            else:
+                provider = CcxtProvider(name)
+            _providers[name] = provider
+        return provider
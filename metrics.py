@@ -0,0 +1,174 @@
+import atexit
+import bisect
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from storage import atomic_write_text
+
+# In-process counters and latency histograms, labelled per stage and per
+# upstream host. Snapshots go to METRICS_PATH on exit (and on every daemon
+# checkpoint): a ``.prom`` path is written in Prometheus text format, which a
+# node_exporter textfile collector can scrape; anything else gets one JSON
+# line appended per snapshot.
+METRICS_PATH = os.getenv('METRICS_PATH')
+# Comma-separated job/stage names to run under cProfile, or "all"
+METRICS_PROFILE = {name.strip() for name in os.getenv('METRICS_PROFILE', '').split(',') if name.strip()}
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_profiling = False
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0}
+        index = bisect.bisect_left(DURATION_BUCKETS, value)
+        if index < len(DURATION_BUCKETS):
+            histogram['buckets'][index] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+@contextmanager
+def _timed(kind, name, labels):
+    started = time.monotonic()
+    try:
+        with profile(name):
+            yield
+    except Exception:
+        inc(f'{kind}_errors_total', **{kind: name}, **labels)
+        raise
+    finally:
+        observe(f'{kind}_duration_seconds', time.monotonic() - started, **{kind: name}, **labels)
+
+
+def stage(name, **labels):
+    """Time a block as ``stage_duration_seconds{stage=name}``; exceptions are counted and re-raised."""
+    return _timed('stage', name, labels)
+
+
+# Scheduled runs get their own series: a job's function usually opens a stage of the same name
+def job(name, **labels):
+    """Time one scheduled run as ``job_duration_seconds{job=name}``; exceptions are counted and re-raised."""
+    return _timed('job', name, labels)
+
+
+def items(stage_name, count):
+    inc('items_processed_total', count, stage=stage_name)
+
+
+@contextmanager
+def profile(name):
+    # Opt-in via METRICS_PROFILE; writes a .prof file per run and logs the top functions.
+    # Only one profiler can be active at a time, so nested or concurrent stages run unprofiled.
+    global _profiling
+    if not (name in METRICS_PROFILE or 'all' in METRICS_PROFILE):
+        yield
+        return
+    with _lock:
+        busy, _profiling = _profiling, True
+    if busy:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        with _lock:
+            _profiling = False
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+        logging.info(f"Profile for {name} written to {path}\n{summary.getvalue()}")
+
+
+def snapshot():
+    with _lock:
+        counters = [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in _counters.items()]
+        histograms = [
+            {'name': name, 'labels': dict(labels), 'buckets': dict(zip(DURATION_BUCKETS, h['buckets'])),
+             'sum': h['sum'], 'count': h['count']}
+            for (name, labels), h in _histograms.items()
+        ]
+    return {'timestamp': time.time(), 'counters': counters, 'histograms': histograms}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels.items()) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def to_prometheus(data=None):
+    data = data or snapshot()
+    lines = []
+    for name in sorted({c['name'] for c in data['counters']}):
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f"{name}{_format_labels(c['labels'])} {c['value']}" for c in data['counters'] if c['name'] == name)
+    for name in sorted({h['name'] for h in data['histograms']}):
+        lines.append(f"# TYPE {name} histogram")
+        for h in (h for h in data['histograms'] if h['name'] == name):
+            cumulative = 0
+            for bound, count in h['buckets'].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(h['labels'], [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(h['labels'], [('le', '+Inf')])} {h['count']}")
+            lines.append(f"{name}_sum{_format_labels(h['labels'])} {h['sum']}")
+            lines.append(f"{name}_count{_format_labels(h['labels'])} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def export(path=None):
+    path = path or METRICS_PATH
+    if not path:
+        return
+    data = snapshot()
+    if path.endswith('.prom'):
+        atomic_write_text(path, to_prometheus(data))
+    else:
+        data['buckets'] = list(DURATION_BUCKETS)
+        for histogram in data['histograms']:
+            histogram['buckets'] = list(histogram['buckets'].values())
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(data) + "\n")
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+atexit.register(export)
@@ -1,90 +1,142 @@
 import requests
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+import market_data
+from coin_universe import CoinUniverse, COIN_UNIVERSE_PATH
+import metrics
+import notifier
+from price_history import PriceHistory
+
+PRICE_FETCH_WORKERS = int(os.getenv('PRICE_FETCH_WORKERS', '8'))
+
+# 行情统一经由 market_data 获取：与其他任务共享连接池、限速额度和短时缓存
+def get_provider():
+    return market_data.get_provider('coingecko')
 
 # 获取所有加密货币的ID和名称
 def get_all_coins():
-    url = "https://api.coingecko.com/api/v3/coins/list"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return get_provider().list_coins()
     except requests.RequestException as e:
         print(f"Error fetching coin list: {e}")
         return []
 
 # 获取某些加密货币的当前价格
-def get_coin_prices(coin_ids):
-    ids = ",".join(coin_ids)
-    url = f"https://api.coingecko.com/api/v3/simple/price?ids={ids}&vs_currencies=usd"
+def get_coin_prices(coin_ids, include_24hr_vol=False):
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return get_provider().simple_prices(coin_ids, include_24hr_vol=include_24hr_vol)
     except requests.RequestException as e:
         print(f"Error fetching coin prices: {e}")
         return {}
 
-# 分批获取所有币种的价格
-def get_all_coin_prices(coin_ids, batch_size=100):
+# 分批并发获取所有币种的价格，共享连接池和限速
+def get_all_coin_prices(coin_ids, batch_size=100, max_workers=PRICE_FETCH_WORKERS, include_24hr_vol=False):
+    batches = [coin_ids[i:i + batch_size] for i in range(0, len(coin_ids), batch_size)]
     all_prices = {}
-    for i in range(0, len(coin_ids), batch_size):
-        batch_ids = coin_ids[i:i + batch_size]
-        prices = get_coin_prices(batch_ids)
-        all_prices.update(prices)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for prices in executor.map(partial(get_coin_prices, include_24hr_vol=include_24hr_vol), batches):
+            all_prices.update(prices)
     return all_prices
 
-# 发送消息到Telegram
-def send_telegram_message(message):
-    token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {
-        'chat_id': chat_id,
-        'text': message
-    }
-    try:
-        response = requests.post(url, data=payload)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        print(f"Error sending message to Telegram: {e}")
+# 发送消息到Telegram，经由后台队列合并发送；key 相同的告警在冷却期内只发一次
+def send_telegram_message(message, key=None):
+    return notifier.notify(message, key=key)
+
+# 价格告警规则：对超过阈值的每个币种和窗口生成 (去重 key, 消息)，实盘与回放共用
+def price_alerts(price_history, threshold, interval, coins_by_id):
+    for window, rows, changes in price_history.crossings(threshold):
+        minutes = window * interval / 60
+        for row, price_change in zip(rows, changes):
+            coin_id = price_history.ids[row]
+            coin = coins_by_id.get(coin_id, {'name': coin_id, 'symbol': '?'})
+            direction = "increased" if price_change > 0 else "decreased"
+            message = f"Coin {coin['name']} ({coin['symbol']}) has {direction} by {price_change * 100:.2f}% in the last {minutes:g} minutes."
+            yield f"{coin_id}:{window}:{direction}", message
+
+# 价格监控器：每次 tick 完成一轮拉价与告警，状态可保存到磁盘以便重启后继续。
+# 币种列表持久化并定时增量刷新；活跃币种每轮拉价，冷门币种按逐步拉长的间隔拉价
+class PriceMonitor:
+    def __init__(self, interval=60, threshold=0.05, windows=(5,), state_path=None, universe_path=COIN_UNIVERSE_PATH):
+        self.interval = interval
+        self.threshold = threshold
+        self.universe = CoinUniverse(universe_path)
+        self.universe.refresh(get_all_coins)
+        self.coins_by_id = self.universe.coins
+        self.ticks = 0
+        self.price_history = None
+        if state_path:
+            self.price_history = PriceHistory.load(state_path, windows, max_age=max(windows) * interval)
+        if self.price_history is None:
+            self.price_history = PriceHistory(list(self.universe.coins), windows)
 
-# 监控价格变化
-def monitor_price_changes(interval=60, threshold=0.05):
-    coins = get_all_coins()
-    price_history = {}
-    coin_ids = [coin['id'] for coin in coins]
+    def tick(self):
+        universe = self.universe
+        with metrics.stage('prices.universe'):
+            universe.refresh(get_all_coins)
+        self.coins_by_id = universe.coins
+        price_history = self.price_history
+
+        due_ids = universe.due(self.ticks)
+        started = time.monotonic()
+        with metrics.stage('prices.fetch'):
+            coin_prices = get_all_coin_prices(due_ids, include_24hr_vol=True)
+        metrics.items('prices.fetch', len(coin_prices))
+        # 拉价受 CoinGecko 限速约束（默认每分钟 30 批、每批 100 个币种），超出间隔时告警，窗口对应的实际时间会变长
+        elapsed = time.monotonic() - started
+        if elapsed > self.interval:
+            metrics.inc('price_sweep_overruns_total')
+            print(f"Warning: price sweep of {len(due_ids)} coins took {elapsed:.0f}s, longer than the "
+                  f"{self.interval:g}s interval; raise COINGECKO_CALLS_PER_MINUTE or the interval.")
+        price_history.add_coins(due_ids)
+
+        # 根据成交量和距上次拉价的涨跌幅调整各币种的拉价间隔；本轮拉价失败的币种保持原有间隔
+        last = price_history.last
+        previous = {coin_id: last[price_history.index[coin_id]] for coin_id in due_ids}
+        universe.record(self.ticks, {coin_id: coin_prices.get(coin_id) for coin_id in due_ids},
+                        {coin_id: price for coin_id, price in previous.items() if np.isfinite(price)})
+        self.ticks += 1
+
+        priced_ids = [coin_id for coin_id, price in coin_prices.items() if price.get('usd') is not None]
+        # 本轮未拉价的在架币种记一个空缺 (NaN)，窗口仍按时间对齐；
+        # 窗口两端任一为空缺时不计算涨跌幅，告警中的"最近 N 分钟"因此总是真实的
+        unpolled = (price_history.counts > 0) & np.fromiter(
+            (coin_id in universe.coins for coin_id in price_history.ids), dtype=bool, count=len(price_history))
+        unpolled[price_history.rows(priced_ids)] = False
+        unpolled_ids = [price_history.ids[row] for row in np.flatnonzero(unpolled)]
+        price_history.update(priced_ids + unpolled_ids,
+                             np.concatenate([[coin_prices[coin_id]['usd'] for coin_id in priced_ids],
+                                             np.full(len(unpolled_ids), np.nan)]))
+
+        alerts = 0
+        with metrics.stage('prices.alerts'):
+            for key, message in price_alerts(price_history, self.threshold, self.interval, self.coins_by_id):
+                print(message)
+                if send_telegram_message(message, key=key):
+                    alerts += 1
+        return alerts
+
+    def save_state(self, path):
+        self.price_history.save(path)
+        self.universe.save()
+
+# 监控价格变化，windows 为以采样次数计的窗口长度，可同时监控多个窗口
+def monitor_price_changes(interval=60, threshold=0.05, windows=(5,)):
+    price_monitor = PriceMonitor(interval, threshold, windows)
 
     while True:
-        coin_prices = get_all_coin_prices(coin_ids)
-        
-        for coin in coins:
-            coin_id = coin['id']
-            current_price = coin_prices.get(coin_id, {}).get('usd', None)
-
-            if current_price is not None:
-                if coin_id not in price_history:
-                    price_history[coin_id] = []
-                
-                price_history[coin_id].append(current_price)
-                
-                if len(price_history[coin_id]) > 5:
-                    price_history[coin_id].pop(0)
-                
-                if len(price_history[coin_id]) == 5:
-                    initial_price = price_history[coin_id][0]
-                    price_change = (current_price - initial_price) / initial_price
-
-                    if price_change > threshold:
-                        message = f"Coin {coin['name']} ({coin['symbol']}) has increased by {price_change * 100:.2f}% in the last 5 minutes."
-                        print(message)
-                        send_telegram_message(message)
-                    elif price_change < -threshold:
-                        message = f"Coin {coin['name']} ({coin['symbol']}) has decreased by {price_change * 100:.2f}% in the last 5 minutes."
-                        print(message)
-                        send_telegram_message(message)
-        
-        time.sleep(interval)
+        started = time.monotonic()
+        with metrics.stage('prices'):
+            price_monitor.tick()
+        metrics.export()
+
+        # 扣除本轮耗时，保持固定的轮询节奏
+        time.sleep(max(0, interval - (time.monotonic() - started)))
 
 if __name__ == "__main__":
-    monitor_price_changes()
+    windows = [int(w) for w in os.getenv('PRICE_WINDOWS', '5').split(',') if w.strip()]
+    monitor_price_changes(windows=windows)
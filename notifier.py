@@ -0,0 +1,159 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+import http_client
+import metrics
+
+# Shared Telegram delivery: alerts are queued and sent from a background
+# thread, coalesced into as few messages as Telegram's size limit allows.
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+MAX_MESSAGE_LENGTH = 4096
+CHAT_MESSAGES_PER_MINUTE = float(os.getenv('TELEGRAM_MESSAGES_PER_MINUTE', '20'))
+ALERT_COOLDOWN = float(os.getenv('ALERT_COOLDOWN_SECONDS', '900'))
+BATCH_DELAY = float(os.getenv('TELEGRAM_BATCH_DELAY', '1.0'))
+SEPARATOR = "\n\n"
+
+_notifiers = {}
+_chat_buckets = {}
+_notifiers_lock = threading.Lock()
+_buckets_lock = threading.Lock()
+
+
+def split_messages(messages, limit=MAX_MESSAGE_LENGTH):
+    """Pack messages into chunks no longer than ``limit``, splitting oversized ones."""
+    chunks = []
+    current = ""
+    for message in messages:
+        while len(message) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(message[:limit])
+            message = message[limit:]
+        if not message:
+            continue
+        if current and len(current) + len(SEPARATOR) + len(message) <= limit:
+            current += SEPARATOR + message
+        else:
+            if current:
+                chunks.append(current)
+            current = message
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TelegramNotifier:
+    def __init__(self, token, chat_id, disable_notification=False, cooldown=ALERT_COOLDOWN,
+                 batch_delay=BATCH_DELAY, messages_per_minute=CHAT_MESSAGES_PER_MINUTE):
+        self.url = f"{TELEGRAM_API_URL}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.disable_notification = disable_notification
+        self.cooldown = cooldown
+        self.batch_delay = batch_delay
+        self.bucket = _chat_bucket(chat_id, messages_per_minute)
+        self.queue = queue.Queue()
+        self.last_alerted = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def notify(self, message, key=None):
+        """Queue ``message``; returns False if ``key`` is still cooling down."""
+        if key is not None:
+            now = time.monotonic()
+            with self.lock:
+                last = self.last_alerted.get(key)
+                if last is not None and now - last < self.cooldown:
+                    logging.debug(f"Suppressing duplicate alert for {key}")
+                    metrics.inc('alerts_suppressed_total')
+                    return False
+                self.last_alerted[key] = now
+                if len(self.last_alerted) > 10000:
+                    self.last_alerted = {k: t for k, t in self.last_alerted.items() if now - t < self.cooldown}
+        self._ensure_started()
+        self.queue.put(message)
+        metrics.inc('alerts_queued_total')
+        return True
+
+    def flush(self):
+        # Block until every queued alert has been delivered or given up on
+        self.queue.join()
+
+    def _ensure_started(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name=f"telegram-{self.chat_id}", daemon=True)
+                self.thread.start()
+
+    def _drain(self):
+        messages = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return messages
+            try:
+                messages.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                return messages
+
+    def _run(self):
+        while True:
+            messages = self._drain()
+            for chunk in split_messages(messages):
+                self.bucket.acquire()
+                try:
+                    self._send(chunk)
+                except Exception as e:
+                    metrics.inc('telegram_messages_failed_total')
+                    logging.error(f"Error sending message to Telegram: {e}")
+            for _ in messages:
+                self.queue.task_done()
+
+    def _send(self, text):
+        payload = {
+            'chat_id': self.chat_id,
+            'text': text,
+            'disable_notification': self.disable_notification
+        }
+        response = http_client.post(self.url, json=payload)
+        if response.status_code == 200:
+            metrics.inc('telegram_messages_sent_total')
+            logging.info("Message sent to Telegram successfully.")
+        else:
+            metrics.inc('telegram_messages_failed_total')
+            logging.error(f"Failed to send message to Telegram: {response.status_code} {response.text}")
+
+
+def _chat_bucket(chat_id, messages_per_minute):
+    # Telegram limits are per chat, so notifiers sharing a chat share a bucket
+    with _buckets_lock:
+        if chat_id not in _chat_buckets:
+            _chat_buckets[chat_id] = http_client.TokenBucket(messages_per_minute / 60.0, 3)
+        return _chat_buckets[chat_id]
+
+
+def get_notifier(token, chat_id, disable_notification=False):
+    key = (token, chat_id, disable_notification)
+    with _notifiers_lock:
+        if key not in _notifiers:
+            _notifiers[key] = TelegramNotifier(token, chat_id, disable_notification)
+        return _notifiers[key]
+
+
+def notify(message, key=None, token=None, chat_id=None, disable_notification=False):
+    token = token or os.getenv('TELEGRAM_BOT_TOKEN')
+    chat_id = chat_id or os.getenv('TELEGRAM_CHAT_ID')
+    return get_notifier(token, chat_id, disable_notification).notify(message, key)
+
+
+@atexit.register
+def flush_all():
+    with _notifiers_lock:
+        notifiers = list(_notifiers.values())
+    for notifier in notifiers:
+        notifier.flush()
@@ -0,0 +1,108 @@
+import os
+import time
+
+import numpy as np
+
+
+class PriceHistory:
+    """Per-coin price ring buffer backed by one ``(n_coins, window)`` array.
+
+    Every coin keeps its own write position, so a coin that is missing from a
+    sweep does not advance, like appending to a per-coin list. To keep a coin's
+    window aligned with wall-clock ticks instead, record NaN for the sweeps it
+    was not polled in: a window that starts or ends on such a gap has no change
+    and raises no alert. ``last`` keeps each coin's most recent real price.
+    Changes over any configured window are computed for all coins at once.
+    """
+
+    def __init__(self, coin_ids=(), windows=(5,)):
+        self.windows = tuple(sorted(set(int(w) for w in windows)))
+        if not self.windows or self.windows[0] < 2:
+            raise ValueError(f"Windows must be at least 2 samples: {windows}")
+        self.capacity = self.windows[-1]
+        self.index = {}
+        self.ids = []
+        self.prices = np.full((0, self.capacity), np.nan)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.last = np.full(0, np.nan)
+        self.add_coins(coin_ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add_coins(self, coin_ids):
+        new_ids = [coin_id for coin_id in dict.fromkeys(coin_ids) if coin_id not in self.index]
+        if not new_ids:
+            return
+        start = len(self.ids)
+        for offset, coin_id in enumerate(new_ids):
+            self.index[coin_id] = start + offset
+        self.ids.extend(new_ids)
+        self.prices = np.vstack([self.prices, np.full((len(new_ids), self.capacity), np.nan)])
+        self.counts = np.concatenate([self.counts, np.zeros(len(new_ids), dtype=np.int64)])
+        self.last = np.concatenate([self.last, np.full(len(new_ids), np.nan)])
+
+    def rows(self, coin_ids):
+        return np.fromiter((self.index[coin_id] for coin_id in coin_ids), dtype=np.intp, count=len(coin_ids))
+
+    def update(self, coin_ids, prices):
+        """Record one sample for each of ``coin_ids``; unknown ids get a new row. NaN marks a gap."""
+        self.add_coins(coin_ids)
+        rows = self.rows(coin_ids)
+        prices = np.asarray(prices, dtype=float)
+        slots = self.counts[rows] % self.capacity
+        self.prices[rows, slots] = prices
+        self.counts[rows] += 1
+        known = np.isfinite(prices)
+        self.last[rows[known]] = prices[known]
+
+    def latest(self):
+        latest = self.prices[np.arange(len(self.ids)), (self.counts - 1) % self.capacity]
+        return np.where(self.counts > 0, latest, np.nan)
+
+    def changes(self, window):
+        """Fractional change between the oldest and newest of the last ``window`` samples.
+
+        Coins with fewer than ``window`` samples (or a zero base price) get NaN.
+        """
+        all_rows = np.arange(len(self.ids))
+        latest = self.prices[all_rows, (self.counts - 1) % self.capacity]
+        oldest = self.prices[all_rows, (self.counts - window) % self.capacity]
+        valid = (self.counts >= window) & (oldest > 0)
+        changes = np.full(len(self.ids), np.nan)
+        np.divide(latest - oldest, oldest, out=changes, where=valid)
+        return changes
+
+    def crossings(self, threshold):
+        """Yield ``(window, rows, changes)`` for coins whose move exceeds ``threshold``."""
+        for window in self.windows:
+            changes = self.changes(window)
+            rows = np.flatnonzero(np.abs(np.nan_to_num(changes)) > threshold)
+            if rows.size:
+                yield window, rows, changes[rows]
+
+    def save(self, path):
+        # Write next to the target and rename, so a crash never leaves a torn checkpoint
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, ids=np.array(self.ids, dtype=str), prices=self.prices, counts=self.counts,
+                 last=self.last, windows=np.array(self.windows), saved_at=np.array(time.time()))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, windows=None, max_age=None):
+        """Restore a checkpoint written by ``save``; returns None if missing or older than ``max_age`` seconds."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if max_age is not None and time.time() - float(data['saved_at']) > max_age:
+                return None
+            saved_windows = tuple(int(w) for w in data['windows'])
+            if windows is not None and max(windows) != max(saved_windows):
+                return None
+            history = cls(windows=windows or saved_windows)
+            history.add_coins(data['ids'].tolist())
+            history.prices[:] = data['prices']
+            history.counts[:] = data['counts']
+            # Checkpoints written before ``last`` existed fall back to the newest sample
+            history.last[:] = data['last'] if 'last' in data.files else history.latest()
+        return history
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+import websockets
+
+import metrics
+import notifier
+
+# Opt-in streaming ingestion: subscribe to exchange ticker channels and apply
+# the polling monitor's threshold rule on every update instead of once a sweep.
+STREAM_WS_URL = os.getenv('STREAM_WS_URL', 'wss://ws.kraken.com/v2')
+STREAM_SYMBOLS = [s.strip() for s in os.getenv('STREAM_SYMBOLS', '').split(',') if s.strip()]
+STREAM_WINDOW_SECONDS = float(os.getenv('STREAM_WINDOW_SECONDS', '300'))
+STREAM_THRESHOLD = float(os.getenv('STREAM_THRESHOLD', '0.05'))
+SUBSCRIBE_BATCH = 100
+MAX_RECONNECT_DELAY = 60
+
+
+class RollingWindow:
+    """Prices seen over the last ``seconds``; change is newest vs. oldest sample still inside."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = deque()
+
+    def add(self, timestamp, price):
+        """Record a sample; returns False for one at or before the newest sample, which is dropped.
+
+        Old ticks arrive again after a reconnect to a replaying source; appending
+        them behind newer ones would turn the window into a bogus change.
+        """
+        if self.samples and timestamp <= self.samples[-1][0]:
+            return False
+        self.samples.append((timestamp, price))
+        cutoff = timestamp - self.seconds
+        while self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return True
+
+    def change(self):
+        oldest = self.samples[0][1]
+        if len(self.samples) < 2 or oldest <= 0:
+            return None
+        return (self.samples[-1][1] - oldest) / oldest
+
+
+class StreamMonitor:
+    def __init__(self, window_seconds=STREAM_WINDOW_SECONDS, threshold=STREAM_THRESHOLD, alert=None):
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+        self.alert = alert or (lambda message, key: notifier.notify(message, key=key))
+        self.windows = {}
+        self.updates = 0
+        self.stale = 0
+
+    def on_tick(self, symbol, price, timestamp=None):
+        window = self.windows.get(symbol)
+        if window is None:
+            window = self.windows[symbol] = RollingWindow(self.window_seconds)
+        if not window.add(timestamp if timestamp is not None else time.time(), price):
+            self.stale += 1
+            return None
+        self.updates += 1
+
+        change = window.change()
+        if change is None or abs(change) <= self.threshold:
+            return None
+        direction = "increased" if change > 0 else "decreased"
+        message = f"{symbol} has {direction} by {change * 100:.2f}% in the last {self.window_seconds / 60:g} minutes."
+        self.alert(message, f"stream:{symbol}:{direction}")
+        return message
+
+
+def subscribe_messages(symbols):
+    for i in range(0, len(symbols), SUBSCRIBE_BATCH):
+        yield json.dumps({"method": "subscribe", "params": {"channel": "ticker", "symbol": symbols[i:i + SUBSCRIBE_BATCH]}})
+
+
+# Kraken v2 ticker messages: {"channel": "ticker", "data": [{"symbol": ..., "last": ...}]}
+def parse_ticks(raw):
+    message = json.loads(raw)
+    if not isinstance(message, dict) or message.get('channel') != 'ticker':
+        return []
+    ticks = []
+    for item in message.get('data', []):
+        if item.get('last') is not None:
+            ticks.append((item['symbol'], float(item['last']), parse_timestamp(item.get('timestamp'))))
+    return ticks
+
+
+def parse_timestamp(value):
+    # Epoch seconds or RFC 3339; None falls back to arrival time
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+async def stream_prices(symbols, stream_monitor, stop, url=STREAM_WS_URL):
+    """Feed ticker updates into ``stream_monitor`` until ``stop`` is set, reconnecting with backoff."""
+    attempt = 0
+    while not stop.is_set():
+        try:
+            async with websockets.connect(url, ping_interval=20) as ws:
+                for message in subscribe_messages(symbols):
+                    await ws.send(message)
+                logging.info(f"Subscribed to {len(symbols)} ticker streams at {url}")
+                attempt = 0
+                while not stop.is_set():
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=1)
+                    except asyncio.TimeoutError:
+                        continue
+                    # One malformed frame must not take the stream down
+                    try:
+                        ticks = parse_ticks(raw)
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        metrics.inc('stream_bad_messages_total')
+                        logging.warning(f"Skipping malformed stream message ({e!r}): {str(raw)[:200]}")
+                        continue
+                    for symbol, price, timestamp in ticks:
+                        stream_monitor.on_tick(symbol, price, timestamp)
+        except (OSError, websockets.WebSocketException) as e:
+            delay = min(MAX_RECONNECT_DELAY, 2 ** attempt)
+            attempt += 1
+            logging.warning(f"Price stream disconnected ({e}), reconnecting in {delay}s")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Local stand-in for the exchange: replays recorded messages (one JSON per line) to every subscriber
+# (port=0 picks a free port; read it from server.sockets[0].getsockname())
+async def serve_replay(ticks_path, host='127.0.0.1', port=8765, delay=0.0):
+    async def handler(ws):
+        await ws.recv()  # wait for the first subscribe
+        with open(ticks_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    await ws.send(line.strip())
+                    if delay:
+                        await asyncio.sleep(delay)
+        await ws.close()
+
+    return await websockets.serve(handler, host, port)
+
+
+def default_symbols():
+    if STREAM_SYMBOLS:
+        return STREAM_SYMBOLS
+    import market_conditions
+    return market_conditions.get_usd_symbols(market_conditions.get_exchange_provider().markets())
+
+
+async def main():
+    stop = asyncio.Event()
+    try:
+        await stream_prices(default_symbols(), StreamMonitor(), stop)
+    finally:
+        notifier.flush_all()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) > 1 and sys.argv[1] == 'replay':
+        # python price_stream.py replay ticks.jsonl [port]
+        async def replay_forever():
+            await serve_replay(sys.argv[2], port=int(sys.argv[3]) if len(sys.argv) > 3 else 8765)
+            await asyncio.Future()
+        asyncio.run(replay_forever())
+    else:
+        asyncio.run(main())
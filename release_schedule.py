@@ -0,0 +1,61 @@
+import calendar
+from datetime import datetime, timedelta, timezone
+
+# Expected release windows of each indicator, in UTC days of the month.
+# Dates are deliberately generous: a window only has to contain the release,
+# the checker then polls inside it until a new observation shows up.
+RELEASE_SCHEDULE = {
+    # BLS Employment Situation, normally the first Friday of the month
+    'Unemployment Rate': {'days': (1, 10)},
+    'Non-Farm Payroll Report': {'days': (1, 10)},
+    'Consumer Price Index (CPI)': {'days': (10, 17)},
+    'Producer Price Index (PPI)': {'days': (9, 17)},
+    # GDP: advance, second and third estimates land late in every month
+    'Real GDP (FRED)': {'days': (23, 31)},
+    # FEDFUNDS is a monthly average published at the start of the next month
+    'Fed Interest Rate Policy': {'days': (1, 4)},
+    'Retail Sales Data': {'days': (12, 18)},
+    # alternative.me refreshes the index once a day at midnight UTC
+    'Fear and Greed Index': {'daily': True},
+}
+
+
+def _month_window(year, month, start_day, end_day):
+    last_day = calendar.monthrange(year, month)[1]
+    start = datetime(year, month, min(start_day, last_day), tzinfo=timezone.utc)
+    end = datetime(year, month, min(end_day, last_day), tzinfo=timezone.utc) + timedelta(days=1)
+    return start, end
+
+
+def current_window(schedule, now):
+    """Return ``(start, end)`` of the most recent release window starting at or before ``now``."""
+    if schedule.get('daily'):
+        start = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        return start, start + timedelta(days=1)
+    start_day, end_day = schedule['days']
+    start, end = _month_window(now.year, now.month, start_day, end_day)
+    if now < start:
+        year, month = (now.year, now.month - 1) if now.month > 1 else (now.year - 1, 12)
+        start, end = _month_window(year, month, start_day, end_day)
+    return start, end
+
+
+def is_due(schedule, state, now, recheck=timedelta(minutes=15), max_stale=timedelta(days=1)):
+    """Decide whether an indicator should be fetched from upstream.
+
+    ``state`` holds ``checked_at`` (last upstream call) and ``released_at``
+    (when a new observation was last seen), both as aware datetimes or None.
+    """
+    checked_at = state.get('checked_at')
+    released_at = state.get('released_at')
+    if checked_at is None:
+        return True
+    if now - checked_at >= max_stale:
+        return True
+    start, end = current_window(schedule, now)
+    if released_at is not None and released_at >= start:
+        return False
+    if now < end:
+        return now - checked_at >= recheck
+    # Window already closed: take one last look in case the release came late
+    return checked_at < end
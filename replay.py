@@ -0,0 +1,201 @@
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import notifier
+from price_history import PriceHistory
+
+# Offline backtest: feeds recorded or synthetic streams through the same rule
+# functions the live monitors use, on simulated time, and writes the alerts
+# they would have sent as JSON lines. Notifier cooldowns are applied in
+# simulated time, so repeated alerts are suppressed exactly as in production.
+
+
+class AlertLog:
+    def __init__(self, cooldown=notifier.ALERT_COOLDOWN):
+        self.cooldown = cooldown
+        self.alerts = []
+        self.last_sent = {}
+        self.suppressed = 0
+
+    def emit(self, timestamp, rule, key, message, **fields):
+        if key is not None:
+            last = self.last_sent.get(key)
+            if last is not None and timestamp - last < self.cooldown:
+                self.suppressed += 1
+                return False
+            self.last_sent[key] = timestamp
+        self.alerts.append({'timestamp': float(timestamp), 'rule': rule, 'key': key, 'message': message, **fields})
+        return True
+
+    def write(self, out):
+        for alert in sorted(self.alerts, key=lambda alert: alert['timestamp']):
+            alert = dict(alert, time=datetime.fromtimestamp(alert['timestamp'], timezone.utc).isoformat())
+            out.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+    def summary(self):
+        counts = {}
+        for alert in self.alerts:
+            counts[alert['rule']] = counts.get(alert['rule'], 0) + 1
+        return {'alerts': counts, 'suppressed_by_cooldown': self.suppressed}
+
+
+def to_epoch(values):
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return (pd.to_datetime(values, utc=True) - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy()
+
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def event_time(event):
+    return float(to_epoch([event['time']])[0])
+
+
+# Wide CSV: a timestamp column (epoch seconds or ISO 8601) and one price column per coin id
+def load_prices(path):
+    frame = pd.read_csv(path)
+    timestamps = to_epoch(frame.pop('timestamp'))
+    return timestamps, list(frame.columns), frame.to_numpy(dtype=float)
+
+
+def synthetic_prices(n_coins, minutes, seed=0, volatility=0.001, jump_rate=1e-4, start=None):
+    """Geometric random walk per coin with occasional +/-10-30% jumps."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, volatility, (minutes, n_coins))
+    jumps = rng.random((minutes, n_coins)) < jump_rate
+    steps[jumps] += rng.choice([-1, 1], jumps.sum()) * rng.uniform(0.1, 0.3, jumps.sum())
+    prices = 100 * np.exp(np.cumsum(steps, axis=0))
+    start = time.time() - minutes * 60 if start is None else start
+    return start + 60 * np.arange(minutes, dtype=float), [f"coin-{i}" for i in range(n_coins)], prices
+
+
+def replay_prices(timestamps, coin_ids, prices, alerts, threshold=0.05, windows=(5,), interval=60):
+    from monitor import price_alerts
+
+    history = PriceHistory(coin_ids, windows)
+    for timestamp, row in zip(timestamps, prices):
+        # Missing prices are recorded as gaps, exactly like coins the live monitor did not poll
+        history.update(coin_ids, row)
+        for key, message in price_alerts(history, threshold, interval, {}):
+            alerts.emit(timestamp, 'price', key, message)
+    return len(timestamps)
+
+
+# One JSON line per run: {"time", "tickers", "ohlcv", "markets"?, "news"}
+def replay_market(path, alerts, rules=None, min_mentions=None):
+    import market_conditions
+    from market_data import ReplayProvider
+
+    min_mentions = market_conditions.MIN_MENTIONS if min_mentions is None else min_mentions
+    rules = market_conditions.default_rules(min_mentions) if rules is None else rules
+    runs = 0
+    for event in read_jsonl(path):
+        provider = ReplayProvider(data=event)
+        market_data = market_conditions.MarketData(provider)
+        symbols = market_conditions.get_usd_symbols(event['markets']) if event.get('markets') else list(event.get('tickers', {}))
+        selected = market_conditions.select_symbols(symbols, market_data, event.get('news', ''), rules)
+        if selected:
+            message, key = market_conditions.selection_alert(selected)
+            alerts.emit(event_time(event), 'market_conditions', key, message, symbols=selected)
+        runs += 1
+    return runs
+
+
+# One JSON line per observation batch: {"time", "values": {indicator: value}}
+def replay_indicators(path, alerts):
+    from indicator_rules import describe_change
+
+    previous = {}
+    events = 0
+    for event in read_jsonl(path):
+        for key, value in event['values'].items():
+            if value is not None and previous.get(key) != value:
+                alerts.emit(event_time(event), 'indicator', None, describe_change(key, previous.get(key), value), indicator=key)
+                previous[key] = value
+        events += 1
+    return events
+
+
+# One JSON line per article: {"time", "title", "content", "url"?}
+def replay_news(path, alerts):
+    from script_loader import load_news_module
+
+    news = load_news_module()
+    articles = 0
+    for event in read_jsonl(path):
+        score = news.analyze_sentiment(event['content'])
+        signal = news.generate_signal(score, event['title'], event['content'], news.keywords)
+        if signal in ["Strong Buy", "Strong Sell"]:
+            message = f"Title: {event['title']}\nSignal: {signal}\nSource: {event.get('url')}"
+            alerts.emit(event_time(event), 'news', None, message, signal=signal, sentiment=score)
+        articles += 1
+    return articles
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Replay recorded or synthetic data through the alert rules.")
+    parser.add_argument('--prices', help="wide CSV of prices: timestamp column plus one column per coin")
+    parser.add_argument('--synthetic', metavar='COINSxMINUTES', help="generate random-walk prices, e.g. 50x43200")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--threshold', type=float, default=0.05)
+    parser.add_argument('--windows', default='5', help="comma-separated sample windows")
+    parser.add_argument('--interval', type=float, default=60, help="seconds between price samples")
+    parser.add_argument('--market', help="JSONL of market snapshots")
+    parser.add_argument('--rules', help="screener rules, e.g. 'change_pct>5,relative_volume>3' (default: market_conditions rules)")
+    parser.add_argument('--min-mentions', type=int)
+    parser.add_argument('--indicators', help="JSONL of indicator observations")
+    parser.add_argument('--news', help="JSONL of articles")
+    parser.add_argument('--cooldown', type=float, default=notifier.ALERT_COOLDOWN)
+    parser.add_argument('--out', help="write alerts here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    alerts = AlertLog(cooldown=args.cooldown)
+    processed = {}
+    started = time.monotonic()
+
+    if args.prices or args.synthetic:
+        if args.prices:
+            timestamps, coin_ids, prices = load_prices(args.prices)
+        else:
+            n_coins, minutes = (int(n) for n in args.synthetic.lower().split('x'))
+            timestamps, coin_ids, prices = synthetic_prices(n_coins, minutes, seed=args.seed)
+        windows = [int(w) for w in args.windows.split(',') if w.strip()]
+        processed['price_samples'] = replay_prices(timestamps, coin_ids, prices, alerts, args.threshold, windows, args.interval)
+    if args.market:
+        from screener import parse_rules
+        rules = parse_rules(args.rules) if args.rules else None
+        processed['market_runs'] = replay_market(args.market, alerts, rules, args.min_mentions)
+    if args.indicators:
+        processed['indicator_events'] = replay_indicators(args.indicators, alerts)
+    if args.news:
+        processed['articles'] = replay_news(args.news, alerts)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as out:
+            alerts.write(out)
+    else:
+        alerts.write(sys.stdout)
+    summary = dict(processed=processed, elapsed_seconds=round(time.monotonic() - started, 3), **alerts.summary())
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,150 @@
+import operator
+import os
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from keyword_matcher import KeywordMatcher
+
+# Columnar screener: tickers and daily candles for every symbol go into one
+# frame, features are computed for all symbols at once and rules are plain
+# "feature op value" strings evaluated column-wise. Rules on ticker features
+# run first, so candles are only downloaded for the symbols still in play.
+SCREENER_OHLCV_DAYS = int(os.getenv('SCREENER_OHLCV_DAYS', '7'))
+
+OPERATORS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+}
+RULE_PATTERN = re.compile(r'^\s*([a-z_0-9]+)\s*(>=|<=|==|!=|>|<)\s*(-?[0-9.eE+-]+)\s*$')
+
+# Available from the tickers call alone
+TICKER_FEATURES = {
+    'last': "last traded price",
+    'change_pct': "24h change in percent, as reported by the exchange",
+    'base_volume': "24h volume in the base currency",
+    'quote_volume': "24h volume in the quote currency",
+    'gain_rank': "1 for the biggest 24h gainer, 2 for the next, ...",
+    'mentions': "whole-word mentions of the base symbol in the news text",
+}
+# Need the daily candles; the last candle is today's and still open
+CANDLE_FEATURES = {
+    'avg_volume': "mean daily volume of the completed candles",
+    'relative_volume': "24h volume over avg_volume",
+    'return_1d': "last price over the previous daily close, minus 1",
+    'return_period': "last price over the first close in the window, minus 1",
+    'volatility': "standard deviation of daily log returns",
+    'breakout': "last price over the highest completed high in the window",
+}
+
+
+# Comma-separated rules such as "relative_volume>2"; a symbol must pass all of them
+def parse_rules(text):
+    rules = []
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        match = RULE_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"Invalid screener rule: {part.strip()!r}")
+        feature, op, value = match.groups()
+        if feature not in TICKER_FEATURES and feature not in CANDLE_FEATURES:
+            raise ValueError(f"Unknown screener feature: {feature!r}")
+        rules.append((feature, op, float(value)))
+    return rules
+
+
+def format_rules(rules):
+    return ','.join(f"{feature}{op}{value:g}" for feature, op, value in rules)
+
+
+# NaN never passes a comparison, so symbols missing a feature drop out
+def evaluate(frame, rules):
+    mask = np.ones(len(frame), dtype=bool)
+    for feature, op, value in rules:
+        mask &= OPERATORS[op](frame[feature].to_numpy(dtype=float), value)
+    return mask
+
+
+def mention_counts(news_content, symbols):
+    # 'BTC/USD' counts mentions of 'BTC', whole words only, in a single pass
+    bases = [symbol.split('/')[0] for symbol in symbols]
+    counts = KeywordMatcher(bases, ignore_case=False).counts(news_content or '')
+    return np.array([counts.get(base, 0) for base in bases], dtype=float)
+
+
+def ticker_frame(tickers, symbols=None):
+    symbols = [symbol for symbol in (symbols if symbols is not None else tickers) if symbol in tickers]
+
+    def column(key):
+        return np.array([tickers[symbol].get(key) for symbol in symbols], dtype=float)
+    frame = pd.DataFrame({
+        'last': column('last'),
+        'change_pct': column('percentage'),
+        'base_volume': column('baseVolume'),
+        'quote_volume': column('quoteVolume'),
+    }, index=pd.Index(symbols, name='symbol'))
+    frame['gain_rank'] = frame['change_pct'].rank(ascending=False, method='first', na_option='bottom')
+    return frame
+
+
+# Align candles into a (symbol, day, OHLCV) array; shorter histories are NaN-padded at the front
+def candle_array(ohlcv, symbols, days):
+    candles = np.full((len(symbols), days, 6), np.nan)
+    for i, symbol in enumerate(symbols):
+        rows = ohlcv.get(symbol)
+        if rows is not None and len(rows):
+            rows = np.asarray(rows[-days:], dtype=float)
+            candles[i, days - len(rows):] = rows
+    return candles
+
+
+def candle_features(candles, last, base_volume):
+    high, close, volume = candles[:, :, 2], candles[:, :, 4], candles[:, :, 5]
+    completed = slice(0, -1)
+    # All-NaN rows (no candles) make nanmean/nanmax warn; their features are simply NaN
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        avg_volume = np.nanmean(volume[:, completed], axis=1)
+        # Fall back to today's candle when the ticker has no 24h volume
+        current_volume = np.where(np.isnan(base_volume), volume[:, -1], base_volume)
+        last = np.where(np.isnan(last), close[:, -1], last)
+        first_close = close[np.arange(len(close)), np.argmax(~np.isnan(close), axis=1)]
+        log_returns = np.diff(np.log(close[:, completed]), axis=1)
+        features = {
+            'avg_volume': avg_volume,
+            'relative_volume': np.where(avg_volume > 0, current_volume / avg_volume, np.nan),
+            'return_1d': last / close[:, -2] - 1,
+            'return_period': last / first_close - 1,
+            'volatility': np.nanstd(log_returns, axis=1) if log_returns.shape[1] else np.full(len(close), np.nan),
+            'breakout': last / np.nanmax(high[:, completed], axis=1),
+        }
+    return features
+
+
+def screen(symbols, market_data, news_content='', rules=(), days=SCREENER_OHLCV_DAYS):
+    """Evaluate ``rules`` over ``symbols``; returns the feature frame of the passing symbols.
+
+    ``market_data`` is a ``market_conditions.MarketData``; only symbols that pass
+    the ticker-level rules have their candles loaded. The result is sorted by
+    24h change, biggest gainer first.
+    """
+    frame = ticker_frame(market_data.load_tickers(symbols), symbols)
+    frame['mentions'] = mention_counts(news_content, frame.index)
+
+    ticker_rules = [rule for rule in rules if rule[0] in TICKER_FEATURES]
+    candle_rules = [rule for rule in rules if rule[0] in CANDLE_FEATURES]
+    frame = frame[evaluate(frame, ticker_rules)]
+    if candle_rules:
+        market_data.load_ohlcv(frame.index, limit=days)
+        candles = candle_array(market_data.ohlcv, frame.index, days)
+        features = candle_features(candles, frame['last'].to_numpy(), frame['base_volume'].to_numpy())
+        frame = frame.assign(**features)
+        frame = frame[evaluate(frame, candle_rules)]
+    return frame.sort_values('change_pct', ascending=False)
@@ -0,0 +1,23 @@
+import importlib.util
+import os
+import sys
+from importlib.machinery import SourceFileLoader
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# The news pipeline lives in the extension-less ``main`` script, which the
+# regular import system cannot see. Load it once under the name ``news_main``.
+def load_news_module():
+    if 'news_main' in sys.modules:
+        return sys.modules['news_main']
+    loader = SourceFileLoader('news_main', os.path.join(ROOT, 'main'))
+    spec = importlib.util.spec_from_loader('news_main', loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['news_main'] = module
+    try:
+        loader.exec_module(module)
+    except BaseException:
+        del sys.modules['news_main']
+        raise
+    return module
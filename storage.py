@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+
+
+# Read a JSON file, falling back to ``default`` if it is missing or corrupt
+def load_json(path, default=None):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.error(f"Failed to read {path}: {e}")
+        return default
+
+
+# Write to a temp file and rename it over ``path`` so readers never see a partial file
+def atomic_write_bytes(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path, text):
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, **dump_kwargs))
+
+
+# Open a SQLite database in WAL mode so readers never block the writer
+def connect_sqlite(path):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
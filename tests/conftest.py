@@ -0,0 +1,37 @@
+import os
+import sys
+import threading
+from contextlib import ExitStack, contextmanager
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@contextmanager
+def serving(handler, **attributes):
+    """Run ``handler`` on a local HTTP server with a free port; ``attributes`` are set on the server.
+
+    ``server.url`` is the base URL. Handlers reach shared state via ``self.server``.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    for name, value in attributes.items():
+        setattr(server, name, value)
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def serve():
+    """``serve(handler, **attributes)`` starts a stub server that is shut down after the test."""
+    with ExitStack() as stack:
+        yield lambda handler, **attributes: stack.enter_context(serving(handler, **attributes))
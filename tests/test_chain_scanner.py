@@ -0,0 +1,129 @@
+import json
+import logging
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+import chain_scanner
+
+ETH_HEAD = 110
+WEI = 10 ** 18
+
+
+def eth_block(number):
+    # Block n carries one transfer of n ETH and one dust transfer
+    return {'number': hex(number), 'timestamp': hex(1700000000 + number), 'transactions': [
+        {'hash': f"0x{number:04x}a", 'from': '0xfrom', 'to': '0xto', 'value': hex(number * WEI)},
+        {'hash': f"0x{number:04x}b", 'from': '0xfrom', 'to': '0xto', 'value': hex(WEI // 100)},
+    ]}
+
+
+def btc_block(height):
+    return {'height': height, 'time': 1700000000 + height, 'tx': [
+        {'txid': f"coinbase{height}", 'vin': [{'coinbase': '00'}], 'vout': [{'value': 6.25}]},
+        {'txid': f"tx{height}", 'vin': [{'txid': 'prev'}],
+         'vout': [{'value': height / 10, 'scriptPubKey': {'address': 'bc1big'}}, {'value': 0.5}]},
+    ]}
+
+
+class RpcHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def result(self, method, params):
+        if method == 'eth_blockNumber':
+            return hex(ETH_HEAD)
+        if method == 'eth_getBlockByNumber':
+            return eth_block(int(params[0], 16))
+        if method == 'getblockcount':
+            return 20
+        if method == 'getblockhash':
+            return f"hash{params[0]}"
+        if method == 'getblock':
+            return btc_block(int(params[0][len('hash'):]))
+        raise KeyError(method)
+
+    def do_POST(self):
+        calls = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        replies = []
+        for call in calls if isinstance(calls, list) else [calls]:
+            try:
+                replies.append({'jsonrpc': '2.0', 'id': call['id'], 'result': self.result(call['method'], call['params'])})
+            except KeyError:
+                replies.append({'jsonrpc': '2.0', 'id': call['id'], 'error': {'code': -32601, 'message': 'Method not found'}})
+        # Batch replies may come back in any order
+        body = json.dumps(replies[::-1]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def rpc_url(serve):
+    return serve(RpcHandler).url
+
+
+def test_batch_splits_calls_and_keeps_order(rpc_url, monkeypatch):
+    monkeypatch.setattr(chain_scanner, 'RPC_BATCH_SIZE', 3)
+    client = chain_scanner.JsonRpcClient(rpc_url)
+    calls = [('getblockhash', [n]) for n in range(8)]
+
+    assert client.batch(calls) == [f"hash{n}" for n in range(8)]
+    assert client.batch_parallel(calls) == [f"hash{n}" for n in range(8)]
+    assert client.call('getblockcount') == 20
+
+
+def test_batch_raises_on_rpc_error(rpc_url):
+    client = chain_scanner.JsonRpcClient(rpc_url)
+    with pytest.raises(chain_scanner.RpcError, match='no_such_method'):
+        client.batch([('getblockcount', []), ('no_such_method', [])])
+
+
+def test_scan_resumes_from_saved_height(rpc_url, tmp_path, monkeypatch):
+    monkeypatch.setattr(chain_scanner, 'RPC_BATCH_SIZE', 4)
+    state_path = str(tmp_path / 'chain_state.json')
+
+    transfers = chain_scanner.scan_new_blocks('ethereum', 100, state_path=state_path, rpc_url=rpc_url)
+    head = ETH_HEAD - chain_scanner.CONFIRMATIONS['ethereum']
+    first = head - chain_scanner.INITIAL_LOOKBACK['ethereum'] + 1
+    assert [t['block'] for t in transfers] == list(range(max(first, 100), head + 1))
+    assert all(t['value'] >= 100 for t in transfers)
+    assert transfers[0]['hash'] == f"0x{max(first, 100):04x}a"
+    assert json.loads((tmp_path / 'chain_state.json').read_text()) == {'ethereum': head}
+
+    # Nothing new until the head moves
+    assert chain_scanner.scan_new_blocks('ethereum', 100, state_path=state_path, rpc_url=rpc_url) == []
+
+
+def test_btc_scan_skips_coinbase_and_sums_outputs(rpc_url, tmp_path):
+    state_path = str(tmp_path / 'chain_state.json')
+    transfers = chain_scanner.scan_new_blocks('bitcoin', 2, state_path=state_path, rpc_url=rpc_url)
+
+    assert [(t['hash'], t['value']) for t in transfers] == [('tx19', 2.4), ('tx20', 2.5)]
+    assert transfers[0]['to'] == ['bc1big', None]
+
+
+def test_missing_endpoint_warns_once(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(chain_scanner, 'BTC_RPC_URL', None)
+    monkeypatch.setattr(chain_scanner, '_unconfigured', set())
+    state_path = str(tmp_path / 'chain_state.json')
+    with caplog.at_level(logging.INFO):
+        assert chain_scanner.scan_new_blocks('bitcoin', 10, state_path=state_path) == []
+        assert chain_scanner.scan_new_blocks('bitcoin', 10, state_path=state_path) == []
+    warnings = [r for r in caplog.records if r.levelno == logging.WARNING]
+    assert len(warnings) == 1
+    assert 'BTC_RPC_URL' in warnings[0].getMessage()
+
+
+def test_pending_scan_leaves_the_height_to_the_caller(rpc_url, tmp_path):
+    state_path = tmp_path / 'chain_state.json'
+    transfers, height = chain_scanner.scan_pending_blocks('bitcoin', 2, state_path=str(state_path), rpc_url=rpc_url)
+    assert [t['hash'] for t in transfers] == ['tx19', 'tx20'] and height == 20
+    assert not state_path.exists()
+
+    chain_scanner.save_height('bitcoin', height, state_path=str(state_path))
+    assert chain_scanner.scan_pending_blocks('bitcoin', 2, state_path=str(state_path), rpc_url=rpc_url) == ([], None)
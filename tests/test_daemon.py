@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # daemon logs to daemon_log.txt in the working directory
+    import daemon
+    return daemon
+
+
+def histogram_count(name, **labels):
+    labels = {k: str(v) for k, v in labels.items()}
+    return sum(h['count'] for h in metrics.snapshot()['histograms'] if h['name'] == name and h['labels'] == labels)
+
+
+def counter_value(name, **labels):
+    labels = {k: str(v) for k, v in labels.items()}
+    return sum(c['value'] for c in metrics.snapshot()['counters'] if c['name'] == name and c['labels'] == labels)
+
+
+def test_job_and_its_stage_are_timed_once_each(daemon):
+    def work():
+        with metrics.stage('test-job'):
+            raise RuntimeError("upstream down")
+
+    stages, jobs = histogram_count('stage_duration_seconds', stage='test-job'), histogram_count('job_duration_seconds', job='test-job')
+    stage_errors, job_errors = counter_value('stage_errors_total', stage='test-job'), counter_value('job_errors_total', job='test-job')
+    asyncio.run(daemon.Job('test-job', work, interval=60).run_once())
+
+    assert histogram_count('stage_duration_seconds', stage='test-job') == stages + 1
+    assert histogram_count('job_duration_seconds', job='test-job') == jobs + 1
+    assert counter_value('stage_errors_total', stage='test-job') == stage_errors + 1
+    assert counter_value('job_errors_total', job='test-job') == job_errors + 1
@@ -0,0 +1,76 @@
+import json
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from feed_poller import FeedPoller, entry_guid
+
+ETAG = '"v1"'
+
+
+def rss(items):
+    entries = "".join(f"<item><title>{guid}</title><link>http://example.com/{guid}</link><guid>{guid}</guid>"
+                      f"<pubDate>{published}</pubDate></item>" for guid, published in items)
+    return f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>feed</title>{entries}</channel></rss>"
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = rss(self.server.items).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def feed(serve):
+    server = serve(FeedHandler, requests=[],
+                   items=[('b', 'Tue, 02 Jan 2024 00:00:00 GMT'), ('a', 'Mon, 01 Jan 2024 00:00:00 GMT')])
+    server.url += '/feed.xml'
+    return server
+
+
+def test_unmarked_entries_are_returned_again(feed, tmp_path):
+    state_path = str(tmp_path / 'feed_state.json')
+    poller = FeedPoller(state_path)
+    assert [entry_guid(e) for e in poller.poll(feed.url)] == ['b', 'a']
+    # Only 'a' was handled; 'b' failed
+    poller.mark_seen(feed.url, ['a'])
+    poller.save()
+
+    # The feed is fetched without validators, so the 304 cannot hide 'b'
+    poller = FeedPoller(state_path)
+    assert [entry_guid(e) for e in poller.poll(feed.url)] == ['b']
+    assert feed.requests == [None, None]
+    poller.mark_seen(feed.url, ['b'])
+    poller.save()
+
+    poller = FeedPoller(state_path)
+    assert poller.poll(feed.url) == []
+    assert feed.requests[-1] == ETAG
+    state = json.load(open(state_path))[feed.url]
+    assert state['seen'] == ['a', 'b']
+    assert state['newest_guid'] == 'b'
+
+
+def test_nothing_is_remembered_without_mark_seen(feed, tmp_path):
+    state_path = str(tmp_path / 'feed_state.json')
+    poller = FeedPoller(state_path)
+    assert len(poller.poll(feed.url)) == 2
+    poller.save()
+
+    assert len(FeedPoller(state_path).poll(feed.url)) == 2
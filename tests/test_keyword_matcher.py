@@ -0,0 +1,17 @@
+from keyword_matcher import KeywordMatcher
+
+
+def test_plurals_count_as_the_term():
+    matcher = KeywordMatcher(["sanction", "regulation", "tax", "ban", "interest rate hike"])
+    text = "New sanctions and regulations, higher taxes, two bans and more interest rate hikes; one tax."
+
+    assert matcher.counts(text) == {"sanction": 1, "regulation": 1, "tax": 2, "ban": 1, "interest rate hike": 1}
+    assert matcher.search("Exchanges face bans") == "ban"
+
+
+def test_terms_still_match_whole_words_only():
+    matcher = KeywordMatcher(["sol", "eth", "tax"])
+
+    assert matcher.counts("A resolution on whether taxation applies") == {}
+    assert matcher.counts("SOL and ETH rally") == {"sol": 1, "eth": 1}
+    assert matcher.search("solstice", "ethics") is None
@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /chat/completions endpoint."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.prompts.append(request['messages'][0]['content'])
+        if self.server.failing:
+            status, body = 400, {'error': {'message': 'model unavailable', 'type': 'invalid_request_error'}}
+        else:
+            status, body = 200, {
+                'id': 'chatcmpl-1', 'object': 'chat.completion', 'created': int(time.time()), 'model': request['model'],
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': f"summary {len(self.server.prompts)}"}}],
+            }
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def chat_server(serve):
+    return serve(ChatHandler, prompts=[], failing=False)
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch, chat_server, sent):
+    monkeypatch.chdir(tmp_path)  # links.db, the log and the data files all live in the working directory
+    import large_transfer_monitor
+
+    monkeypatch.setattr(large_transfer_monitor, 'OPENAI_BASE_API_URL', chat_server.url + '/v1')
+    monkeypatch.setattr(large_transfer_monitor, 'OPENAI_API_SECRET_KEY', 'test')
+    monkeypatch.setattr(large_transfer_monitor, '_openai_client', None)
+    monkeypatch.setattr(large_transfer_monitor, 'send_message_to_telegram', lambda message: sent.append(message) or True)
+    return large_transfer_monitor
+
+
+def transfer(n, value, age=60):
+    return {'chain': 'ethereum', 'hash': f"0x{n}", 'block': n, 'timestamp': time.time() - age,
+            'from': '0xfrom', 'to': '0xto', 'value': value}
+
+
+def scans(monkeypatch, module, *batches):
+    results = iter(batches)
+    monkeypatch.setattr(module, 'check_large_transfers',
+                        lambda coin_id, threshold: (next(results), None) if coin_id == 'ethereum' else ([], None))
+
+
+def test_transfers_are_summarized_once(monitor, chat_server, sent, monkeypatch):
+    scans(monkeypatch, monitor, [transfer(1, 150.0), transfer(2, 900.0)], [transfer(1, 150.0)])
+
+    monitor.check_and_log_data()
+    assert sent == ['summary 1']
+    assert len(chat_server.prompts) == 1
+    # Biggest transfer first in the prompt
+    assert chat_server.prompts[0].index('0x2') < chat_server.prompts[0].index('0x1')
+
+    monitor.check_and_log_data()
+    assert sent == ['summary 1']
+    assert len(chat_server.prompts) == 1
+
+
+def test_unreported_transfers_are_retried_then_aged_out(monitor, chat_server, sent, monkeypatch):
+    monkeypatch.setattr(monitor, 'MAX_PENDING_TRANSFERS', 2)
+    chat_server.failing = True
+    scans(monkeypatch, monitor,
+          [transfer(1, 150.0), transfer(2, 900.0), transfer(3, 120.0)],
+          [transfer(4, 500.0, age=2 * monitor.PENDING_TRANSFER_MAX_AGE)],
+          [])
+
+    monitor.check_and_log_data()
+    assert sent == []
+    pending = json.load(open(monitor.TRANSFERS_DATA_PATH))
+    assert [t['hash'] for t in pending] == ['0x2', '0x1']
+
+    # Still failing: the backlog is retried, the stale scan result never enters it
+    monitor.check_and_log_data()
+    assert [t['hash'] for t in json.load(open(monitor.TRANSFERS_DATA_PATH))] == ['0x2', '0x1']
+
+    chat_server.failing = False
+    monitor.check_and_log_data()
+    assert sent == ['summary 3']
+    assert '0x3' not in chat_server.prompts[-1] and '0x4' not in chat_server.prompts[-1]
+
+
+def test_failing_chain_does_not_lose_the_other_chains_transfers(monitor, sent, monkeypatch):
+    def scan(chain, threshold):
+        if chain == 'bitcoin':
+            raise KeyError('tx')  # a malformed block
+        return [transfer(1, 150.0)], 105
+    monkeypatch.setattr(monitor.chain_scanner, 'scan_pending_blocks', scan)
+
+    monitor.check_and_log_data()
+    assert sent == ['summary 1']
+    assert json.load(open(monitor.chain_scanner.CHAIN_STATE_PATH)) == {'ethereum': 105}
+
+
+def test_heights_are_saved_only_after_transfers(monitor, monkeypatch):
+    monkeypatch.setattr(monitor.chain_scanner, 'scan_pending_blocks',
+                        lambda chain, threshold: ([transfer(1, 150.0)], 105) if chain == 'ethereum' else ([], None))
+
+    def disk_full(path, data, **kwargs):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(monitor, 'atomic_write_json', disk_full)
+
+    monitor.check_and_log_data()
+    assert not os.path.exists(monitor.chain_scanner.CHAIN_STATE_PATH)
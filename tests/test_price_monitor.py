@@ -0,0 +1,98 @@
+import time
+
+import numpy as np
+import pytest
+
+import monitor
+from coin_universe import CoinUniverse
+from price_history import PriceHistory
+
+COINS = [{'id': 'busy', 'symbol': 'bsy', 'name': 'Busy'}, {'id': 'quiet', 'symbol': 'qt', 'name': 'Quiet'}]
+
+
+def test_record_skips_coins_without_a_price():
+    universe = CoinUniverse(path=None, max_poll_interval=8)
+    universe.refresh(lambda: COINS)
+    universe.record(0, {'busy': {'usd': 1.0, 'usd_24h_vol': 1e9}, 'quiet': {'usd': 1.0, 'usd_24h_vol': 0}})
+    intervals, next_due = dict(universe.intervals), dict(universe.next_due)
+
+    # A failed batch: nothing came back, so nothing about the tiers is learned
+    universe.record(5, {'busy': None, 'quiet': None})
+    assert universe.intervals == intervals
+    assert universe.next_due == next_due
+
+    universe.record(5, {'busy': {'usd': 1.0, 'usd_24h_vol': 1e9}, 'quiet': {'usd': 1.0}})
+    assert universe.intervals == {'busy': 1, 'quiet': 4}
+
+
+def test_gaps_keep_windows_out_of_alerts():
+    history = PriceHistory(['a'], windows=(3,))
+    history.update(['a'], [100.0])
+    history.update(['a'], [np.nan])
+    history.update(['a'], [np.nan])
+    history.update(['a'], [120.0])
+    assert np.isnan(history.changes(3)[0])
+    assert list(history.crossings(0.05)) == []
+    assert history.last[0] == 120.0
+
+    history.update(['a'], [130.0])
+    history.update(['a'], [140.0])
+    assert history.changes(3)[0] == pytest.approx(140 / 120 - 1)
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def price_monitor(tmp_path, monkeypatch, sent):
+    monkeypatch.setattr(monitor, 'get_all_coins', lambda: COINS)
+    monkeypatch.setattr(monitor, 'send_telegram_message', lambda message, key=None: sent.append(message) or True)
+    price_monitor = monitor.PriceMonitor(interval=60, threshold=0.05, windows=(3,),
+                                         universe_path=str(tmp_path / 'coin_universe.json'))
+    price_monitor.universe.max_poll_interval = 4
+    return price_monitor
+
+
+def run_ticks(price_monitor, monkeypatch, prices_by_tick):
+    for prices in prices_by_tick:
+        due = set(price_monitor.universe.due(price_monitor.ticks))
+        monkeypatch.setattr(monitor, 'get_all_coin_prices',
+                            lambda coin_ids, include_24hr_vol=False: {c: p for c, p in prices.items() if c in due})
+        price_monitor.tick()
+
+
+def test_failed_fetch_does_not_back_off(price_monitor, sent, monkeypatch):
+    busy = {'usd': 10.0, 'usd_24h_vol': 1e9}
+    quiet = {'usd': 1.0, 'usd_24h_vol': 0}
+    run_ticks(price_monitor, monkeypatch, [{'busy': busy, 'quiet': quiet}, {}, {}, {}])
+
+    assert price_monitor.universe.intervals == {'busy': 1, 'quiet': 2}
+    assert sent == []
+
+
+def test_moves_between_sparse_polls_do_not_alert(price_monitor, sent, monkeypatch):
+    # The quiet coin is polled on ticks 0, 2, 6 and 10, then jumps 10% between the polls on 6 and 10;
+    # that move spans four ticks, not the three-sample window, so it must not alert
+    quiet = [1.0] * 10 + [1.1] * 3
+    busy = [10.0] * 10 + [10.5, 11.0, 11.0]
+    run_ticks(price_monitor, monkeypatch, [
+        {'busy': {'usd': busy[tick], 'usd_24h_vol': 1e9}, 'quiet': {'usd': quiet[tick]}} for tick in range(13)])
+
+    assert sent == ["Coin Busy (bsy) has increased by 10.00% in the last 3 minutes."]
+    history = price_monitor.price_history
+    assert history.last[history.index['quiet']] == pytest.approx(1.1)
+
+
+def test_sweep_longer_than_the_interval_warns(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(monitor, 'get_all_coins', lambda: COINS)
+    price_monitor = monitor.PriceMonitor(interval=0.01, windows=(3,), universe_path=str(tmp_path / 'coin_universe.json'))
+
+    def slow_fetch(coin_ids, include_24hr_vol=False):
+        time.sleep(0.05)
+        return {coin_id: {'usd': 1.0} for coin_id in coin_ids}
+    monkeypatch.setattr(monitor, 'get_all_coin_prices', slow_fetch)
+    price_monitor.tick()
+
+    assert "price sweep of 2 coins took" in capsys.readouterr().out
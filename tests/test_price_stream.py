@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import price_stream
+
+
+def ticker(symbol, last, timestamp):
+    return json.dumps({'channel': 'ticker', 'data': [{'symbol': symbol, 'last': last, 'timestamp': timestamp}]})
+
+
+FIXTURE = [
+    json.dumps({'channel': 'status', 'data': [{'system': 'online'}]}),
+    ticker('BTC/USD', 100.0, '2024-01-01T00:00:00Z'),
+    ticker('ETH/USD', 50.0, '2024-01-01T00:00:00Z'),
+    'not json',
+    json.dumps({'channel': 'ticker', 'data': [{'symbol': 'BTC/USD', 'last': 'n/a'}]}),
+    json.dumps({'channel': 'ticker', 'data': [{'last': 1.0}]}),
+    json.dumps({'channel': 'ticker', 'data': None}),
+    ticker('BTC/USD', 103.0, '2024-01-01T00:01:00Z'),
+    ticker('ETH/USD', 47.0, '2024-01-01T00:02:00Z'),
+    ticker('BTC/USD', 107.0, '2024-01-01T00:03:00Z'),
+]
+
+
+def run_stream(tmp_path, stale_ticks):
+    path = tmp_path / 'ticks.jsonl'
+    path.write_text('\n'.join(FIXTURE) + '\n', encoding='utf-8')
+    alerts = []
+    monitor = price_stream.StreamMonitor(window_seconds=300, threshold=0.05,
+                                         alert=lambda message, key: alerts.append((key, message)))
+
+    async def scenario():
+        server = await price_stream.serve_replay(str(path), port=0)
+        port = server.sockets[0].getsockname()[1]
+        stop = asyncio.Event()
+        task = asyncio.create_task(price_stream.stream_prices(['BTC/USD', 'ETH/USD'], monitor, stop,
+                                                             url=f"ws://127.0.0.1:{port}"))
+        try:
+            async def replayed():
+                # The replay closes after each pass; the second pass repeats every tick
+                while monitor.stale < stale_ticks:
+                    await asyncio.sleep(0.05)
+            await asyncio.wait_for(replayed(), timeout=10)
+        finally:
+            stop.set()
+            await asyncio.wait_for(task, timeout=5)
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(scenario())
+    return monitor, alerts
+
+
+def test_replay_produces_expected_alerts(tmp_path):
+    monitor, alerts = run_stream(tmp_path, stale_ticks=5)
+
+    assert monitor.updates == 5
+    assert alerts == [
+        ('stream:ETH/USD:decreased', "ETH/USD has decreased by -6.00% in the last 5 minutes."),
+        ('stream:BTC/USD:increased', "BTC/USD has increased by 7.00% in the last 5 minutes."),
+    ]
+
+
+def test_reconnect_does_not_replay_old_ticks_into_windows():
+    window = price_stream.RollingWindow(300)
+    assert window.add(100.0, 10.0)
+    assert window.add(160.0, 11.0)
+    assert not window.add(100.0, 10.0)
+    assert not window.add(160.0, 11.5)
+    assert window.add(170.0, 10.5)
+    assert [price for _, price in window.samples] == [10.0, 11.0, 10.5]
+    assert window.change() == 0.05
+
+
+def test_failing_stream_is_restarted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # daemon logs to daemon_log.txt in the working directory
+    import daemon
+
+    calls = []
+
+    async def flaky(stop):
+        calls.append(len(calls))
+        if len(calls) < 3:
+            raise ValueError("bad frame")
+        stop.set()
+
+    async def scenario():
+        stop = asyncio.Event()
+        await asyncio.wait_for(daemon.supervise('stream', flaky, stop, restart_delay=0.01), timeout=5)
+
+    asyncio.run(scenario())
+    assert calls == [0, 1, 2]
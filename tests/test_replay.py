@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import monitor
+import replay
+
+NAN = np.nan
+PRICES = np.array([
+    [100, 50],
+    [NAN, 50],
+    [NAN, 51],
+    [NAN, 52],
+    [NAN, 55],
+    [101, 56],
+    [130, NAN],
+    [131, 60],
+    [132, 61],
+    [150, 61],
+], dtype=float)
+COIN_IDS = ['a', 'b']
+
+
+def replay_keys(prices):
+    alerts = replay.AlertLog(cooldown=0)
+    replay.replay_prices(60 * np.arange(len(prices), dtype=float), COIN_IDS, prices, alerts, windows=(3,))
+    return [(int(alert['timestamp'] // 60), alert['key']) for alert in alerts.alerts]
+
+
+def live_keys(prices, tmp_path, monkeypatch):
+    sent = []
+    monkeypatch.setattr(monitor, 'get_all_coins', lambda: [{'id': c, 'symbol': c, 'name': c} for c in COIN_IDS])
+    price_monitor = monitor.PriceMonitor(interval=60, threshold=0.05, windows=(3,),
+                                         universe_path=str(tmp_path / 'coin_universe.json'))
+    # Every coin is asked for on every tick; a NaN is a coin the sweep got no price for
+    monkeypatch.setattr(price_monitor.universe, 'due', lambda tick: list(COIN_IDS))
+    for tick, row in enumerate(prices):
+        monkeypatch.setattr(monitor, 'get_all_coin_prices', lambda coin_ids, include_24hr_vol=False, row=row: {
+            coin_id: {'usd': price} for coin_id, price in zip(COIN_IDS, row) if np.isfinite(price)})
+        monkeypatch.setattr(monitor, 'send_telegram_message', lambda message, key=None, tick=tick: sent.append((tick, key)))
+        price_monitor.tick()
+    return sent
+
+
+def test_replay_matches_live_monitor_on_gaps(tmp_path, monkeypatch):
+    # 'a' jumps 30% on tick 6, but its window then starts on a gap; no alert until tick 7
+    expected = [(4, 'b:3:increased'), (5, 'b:3:increased'), (7, 'a:3:increased'), (7, 'b:3:increased'),
+                (9, 'a:3:increased')]
+    assert replay_keys(PRICES) == expected
+    assert live_keys(PRICES, tmp_path, monkeypatch) == expected
+
+
+def test_move_across_a_gap_does_not_alert():
+    assert replay_keys(np.array([[100, 1], [NAN, 1], [NAN, 1], [NAN, 1], [NAN, 1], [101, 1], [130, 1]], dtype=float)) == []